@@ -11,7 +11,11 @@ from subprocess import call
 from forms import BenchmarkerForm, ChangePasswordForm
 
 from crawler.scripts.run_crawler import run_crawler
+from crawler.utils.profile_change_log import ProfileChangeLog
+from crawler.utils.profile_schema import migrate_profiles, migrate_school_ranks, parse_year, YEAR_COLUMNS, RESEARCH_COLUMNS
 from benchmarker.rankalgo import run_benchmarker
+from benchmarker.similarity import preload_models
+from crawler.utils.model_registry import MODEL_REGISTRY
 
 
 DATABASE = 'database.db'
@@ -19,6 +23,10 @@ DATABASE = 'database.db'
 app = Flask(__name__)
 app.secret_key = 'shhhhh'
 
+# Load the language models at startup rather than on the first benchmark, unless PRELOAD_MODELS=0
+if os.environ.get('PRELOAD_MODELS', '1') != '0':
+    preload_models()
+
 ##### Functions to init database
 # Connect to database
 def get_db():
@@ -55,6 +63,12 @@ def initdb():
     init_db()
     click.echo('Init the db')
 
+# Bring databases created before up to date with the profiles columns, indexes and change log, and the school ranks
+@app.before_first_request
+def migrate_db():
+    migrate_profiles(get_db())
+    migrate_school_ranks(get_db())
+
 @app.teardown_appcontext
 def close_connection(exception):
     db = getattr(g, '_database', None)
@@ -217,6 +231,9 @@ def start_crawler():
             print(' '.join(["scrapy", "crawl", "core", "-a", 'start_university="%s"' % university_joined, "-a", 'start_department="%s"' % dep_name, "-a", 'PRIORITIZED=True']))
             print("CRAWL!")
             call(["scrapy", "crawl", "core", "-a", 'start_university=%s' % university_joined, "-a", 'start_department=%s' % dep_name, "-a", 'PRIORITIZED=True'])
+            # Embed the research areas crawled and bring the research area models of the department up to date
+            call([sys.executable, "-m", "benchmarker.research_embeddings", dep_name])
+            call([sys.executable, "-m", "benchmarker.department_models", "--update", dep_name])
             return redirect(url_for('crawler', dep=dep))
     else:
         return redirect(url_for('main'))
@@ -255,12 +272,11 @@ def retrieve_database():
         dep_name = helper.get_full_name(dep)
         incomplete = request.args.get('incomplete')
         if incomplete == 'true':
-            query_str = ''.join(["select * from profiles where department = ? and name = 'Unknown'",
-                " union select * from profiles where department = ? and phd_year = 'Unknown'",
-                " union select * from profiles where department = ? and phd_school = 'Unknown'",
-                " union select * from profiles where department = ? and promotion_year = 'Unknown'",
-                " union select * from profiles where department = ? and text_raw = '' order by university, name asc"])
-            preview = query_db(query_str, (dep_name, dep_name, dep_name, dep_name, dep_name))
+            # Unknown years are NULL in the typed year columns
+            query_str = ''.join(["select * from profiles where department = ? and (name = 'Unknown'",
+                " or phd_year_int is null or phd_school = 'Unknown' or promotion_year_int is null",
+                " or text_raw = '') order by university, name asc"])
+            preview = query_db(query_str, (dep_name,))
         else:
             preview = query_db('select * from profiles where department = ? order by university, name asc', (dep_name,))
         return render_template('database.html', dep=dep, incomplete=incomplete, preview=preview, dep_name=dep_name)
@@ -280,12 +296,33 @@ def edit_database():
         new_value = request.form.get('new_value')
         insert_str = 'update profiles set %s = ?, user_updated = ? where profile_link = ?' % (field)
         insert_db(insert_str, (new_value, 1, profile_link))
+        if field in YEAR_COLUMNS:
+            # Keep the typed year in step with the edited year
+            insert_db('update profiles set %s = ? where profile_link = ?' % YEAR_COLUMNS[field], (parse_year(new_value), profile_link))
+        elif field == 'phd_school':
+            # The saved rank is of the school before the edit
+            insert_db('update profiles set phd_school_rank = null where profile_link = ?', (profile_link,))
+        elif field == 'text_raw':
+            # The research area is embedded again at the next ingest
+            insert_db('update profiles set %s where profile_link = ?' % ', '.join('%s = null' % column for column in RESEARCH_COLUMNS), (profile_link,))
         insert_db('insert into activities (activity_timestamp, user_id, activity_name, remark) values (?, ?, ?, ?)',
             (datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), session['user_id'], 'edit database', helper.get_full_name(dep)))
         return redirect(url_for('retrieve_database', dep=dep, incomplete=incomplete))
     else:
         return redirect(url_for('main'))
 
+##### Profiles changed since a revision
+# Edits above and crawler writes are both logged, so caches of data derived from profiles
+# can refresh only the profiles returned here
+@app.route('/database/changes')
+def database_changes():
+    if 'username' in session:
+        since = request.args.get('since', 0, type=int)
+        revision, changes = ProfileChangeLog(get_db()).get_changes_since(since)
+        return jsonify(revision=revision, changes=changes)
+    else:
+        return redirect(url_for('main'))
+
 ##### Benchmarker page
 @app.route('/benchmarker/')
 def benchmarker():
@@ -301,7 +338,7 @@ def start_benchmarker():
         form = BenchmarkerForm(request.form)
         if form.validate():
             # check that database for the department is populated
-            preview = query_db('select * from profiles where department = ?', (form.department.data,))
+            preview = query_db('select 1 from profiles where department = ? limit 1', (form.department.data,))
             if len(preview) == 0:
                 flash('The database for %s is empty. Please populate the database by running the crawler first' % (form.department.data))
                 return redirect(url_for('benchmarker'))
@@ -358,6 +395,14 @@ def start_benchmarker():
     else:
         return redirect(url_for('main'))
 
+@app.route('/benchmarker/models')
+def benchmarker_models():
+    if 'username' in session:
+        # Load time of every model of the process and how often it has been served warm
+        return jsonify(models=MODEL_REGISTRY.get_stats())
+    else:
+        return redirect(url_for('main'))
+
 @app.route('/benchmarker/benchmark/<filename>')
 def benchmark_download(filename):
     return send_from_directory('results', filename)
@@ -0,0 +1,80 @@
+import json
+import sqlite3
+from itertools import chain
+
+# corpora read document by document on every iteration instead of being concatenated into one list, as gensim
+# goes over a corpus several times (Phrases once, Word2Vec once for the vocabulary and once per epoch)
+# a document is the list of sentences of a profile, and a sentence a list of words
+CHUNK_SIZE = 500
+
+
+def join_sentences(sentences):
+    # words of a document, as sum(sentences, []) without copying the list once per sentence
+    return list(chain.from_iterable(sentences))
+
+
+class SentenceCorpus:
+    # sentences of every document, transformed by the phraser if given
+    def __init__(self, documents, phraser = None):
+        self.documents = documents
+        self.phraser = phraser
+
+    def __iter__(self):
+        for doc in self.documents:
+            for sentence in doc:
+                yield self.phraser[sentence] if self.phraser is not None else sentence
+
+
+class DocumentCorpus:
+    # words of every document, transformed by the phraser if given, as bag of words if a dictionary is given
+    def __init__(self, documents, phraser = None, dictionary = None):
+        self.documents = documents
+        self.phraser = phraser
+        self.dictionary = dictionary
+
+    def __iter__(self):
+        for doc in self.documents:
+            words = join_sentences(self.phraser[sentence] for sentence in doc) if self.phraser is not None \
+                else join_sentences(doc)
+            yield self.dictionary.doc2bow(words) if self.dictionary is not None else words
+
+    def __len__(self):
+        return len(self.documents)
+
+
+class ProfileDocuments:
+    # sentences of the profiles of a department, read from the sentences stored at ingest on every iteration
+    # profiles not embedded yet are read as empty documents
+    def __init__(self, department, database = "database.db", links = None):
+        self.department = department
+        self.database = database
+        self.links = links
+
+    def __iter__(self):
+        for _, sentences in self.iter_profiles():
+            yield sentences
+
+    def iter_profiles(self):
+        # (profile link, sentences) of every profile, in the order of the profiles table
+        con = sqlite3.connect(self.database)
+        try:
+            for query, params in self.get_queries("profile_link, research_sentences"):
+                for link, sentences in con.execute(query, params):
+                    yield link, json.loads(sentences) if sentences is not None else []
+        finally:
+            con.close()
+
+    def __len__(self):
+        con = sqlite3.connect(self.database)
+        count = sum(con.execute(query, params).fetchone()[0] for query, params in self.get_queries("count(*)"))
+        con.close()
+        return count
+
+    def get_queries(self, columns):
+        query = "select %s from profiles where department = ?" % columns
+        if self.links is None:
+            return [(query + " order by rowid", (self.department, ))]
+        # links are looked up a chunk at a time, below the limit of SQLite variables
+        return [(query + " and profile_link in (%s) order by rowid" % ", ".join("?" * len(chunk)),
+                 [self.department] + chunk)
+                for chunk in [self.links[i:i + CHUNK_SIZE] for i in range(0, len(self.links), CHUNK_SIZE)]]
@@ -0,0 +1,233 @@
+import datetime
+import json
+import os
+import pickle
+import re
+import sqlite3
+import sys
+import threading
+import numpy as np
+from gensim import similarities
+from gensim.corpora import Dictionary
+from gensim.models import ldamodel, Word2Vec
+from gensim.models.phrases import Phrases, Phraser
+from crawler.utils.model_registry import MODEL_REGISTRY
+from crawler.utils.profile_change_log import ProfileChangeLog
+from .corpus import SentenceCorpus, DocumentCorpus, ProfileDocuments, join_sentences
+from .research_embeddings import ingest_embeddings
+
+# trained after a crawl and read by the benchmarker, example (from the integrated directory):
+# python -m benchmarker.department_models --update Geography
+MODEL_DIRECTORY = "./benchmarker/data/models"
+WORD2VEC_PARAMS = {"min_count": 1, "iter": 200}
+LDA_PARAMS = {"num_topics": 25, "random_state": 124}
+# the random state of a saved LDA model is shared by the requests folding their query into it
+LDA_LOCK = threading.Lock()
+
+
+class DepartmentModels:
+    # phrase, word2vec and LDA models of a department trained on the research areas of its profiles, saved along with
+    # the LDA topics of every profile as a similarity index and the profiles revision they are up to date with
+    # the sentences of the profiles are the ones stored at ingest, saved transformed by the phraser as well so that
+    # the benchmarker only transforms the query
+    # every save writes a new version of the files and then switches the meta file to it, so that requests reading
+    # the memory-mapped files of the version before are not affected
+
+    def __init__(self, department, directory = MODEL_DIRECTORY, database = "database.db"):
+        self.department = department
+        self.directory = os.path.join(directory, re.sub(r"[^a-z0-9]+", "_", department.lower()).strip("_"))
+        self.database = database
+        self.meta = self.read_meta()
+
+    def read_meta(self):
+        path = os.path.join(self.directory, "meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def is_trained(self):
+        return self.meta is not None
+
+    def get_path(self, name):
+        return os.path.join(self.directory, self.meta["files"][name])
+
+    # models are loaded once per process through the registry, memory-mapped, the version loaded before is dropped
+    # once a new one is loaded
+    @property
+    def phraser(self):
+        return MODEL_REGISTRY.get_gensim_model(Phraser, self.get_path("phraser"), group = (self.directory, "phraser"))
+
+    @property
+    def word2vec(self):
+        return MODEL_REGISTRY.get_gensim_model(Word2Vec, self.get_path("word2vec"), group = (self.directory, "word2vec"))
+
+    @property
+    def dictionary(self):
+        return MODEL_REGISTRY.get_gensim_model(Dictionary, self.get_path("dictionary"),
+                                               group = (self.directory, "dictionary"))
+
+    @property
+    def lda(self):
+        return MODEL_REGISTRY.get_gensim_model(ldamodel.LdaModel, self.get_path("lda"), group = (self.directory, "lda"))
+
+    @property
+    def lda_index(self):
+        # topics of every profile, with the row of every profile link in lda_rows
+        return MODEL_REGISTRY.get_gensim_model(similarities.MatrixSimilarity, self.get_path("lda_index"),
+                                               group = (self.directory, "lda_index"))
+
+    @property
+    def lda_rows(self):
+        return self.get_pickle("lda_rows")
+
+    @property
+    def bigram_sentences(self):
+        # sentences of every profile transformed by the phraser, by profile link, none for models saved before
+        return self.get_pickle("bigram_sentences") if "bigram_sentences" in self.meta["files"] else {}
+
+    def get_pickle(self, name):
+        return MODEL_REGISTRY.get(("pickle", self.get_path(name)), lambda: load_pickle(self.get_path(name)),
+                                  group = (self.directory, name))
+
+    def has_lda(self):
+        # models saved before the LDA model was kept have to be updated first
+        return "lda" in self.meta["files"]
+
+    def get_topics(self, doc, seed):
+        # fold a document into the LDA model, starting from the seed for the same document to get the same topics
+        model_lda = self.lda
+        with LDA_LOCK:
+            model_lda.random_state = np.random.RandomState(seed)
+            return model_lda[doc]
+
+    def train(self):
+        # train from scratch on every profile of the department, streaming the sentences stored at ingest from the
+        # database on every pass rather than holding the corpus in memory
+        revision = self.ingest()
+        documents = ProfileDocuments(self.department, self.database)
+        phrases = Phrases(SentenceCorpus(documents))
+        bigram = Phraser(phrases)
+        if len(phrases.vocab) == 0:
+            return False
+        model = Word2Vec(SentenceCorpus(documents, bigram), **WORD2VEC_PARAMS)
+        models = {"phraser": bigram, "word2vec": model}
+        models.update(self.build_lda(documents, bigram))
+        self.save(revision, models)
+        return True
+
+    def update(self):
+        # train the saved models further on the profiles changed since they were trained, or from scratch the first time
+        if not self.is_trained():
+            return self.train()
+        self.ingest()
+        con = sqlite3.connect(self.database)
+        revision, changes = ProfileChangeLog(con).get_changes_since(self.meta["revision"])
+        con.close()
+        links = [change["profile_link"] for change in changes]
+        changed = ProfileDocuments(self.department, self.database, links)
+        rows = self.lda_rows if self.has_lda() else {}
+        if len(changed) == 0 and not any(link in rows for link in links):
+            # none of the changes are of the department
+            if revision != self.meta["revision"]:
+                self.write_meta(dict(self.meta, revision = revision))
+            return False
+
+        # phrases are counted again over the department in a single pass, as adding the changed profiles to the saved
+        # counts would count edited profiles twice, along with their text before the edit
+        documents = ProfileDocuments(self.department, self.database)
+        bigram = Phraser(Phrases(SentenceCorpus(documents)))
+
+        # the word2vec model is loaded in memory rather than memory-mapped to be trained further on the changed
+        # profiles only, for the iterations it was trained with (train takes no epochs before gensim 2)
+        model = Word2Vec.load(self.get_path("word2vec"))
+        if any(True for _ in SentenceCorpus(changed)):
+            model.build_vocab(SentenceCorpus(changed, bigram), update = True)
+            model.train(SentenceCorpus(changed, bigram), total_examples = model.corpus_count)
+
+        # topics are not comparable once the dictionary changes, so the LDA model is trained again for the revision,
+        # from the sentences stored at ingest without parsing the profiles again
+        models = {"phraser": bigram, "word2vec": model}
+        models.update(self.build_lda(documents, bigram))
+        self.save(revision, models)
+        return True
+
+    def ingest(self):
+        # embed the profiles crawled since the last ingest first, returning the revision the models will be up to date
+        # with, taken before reading the profiles for later changes to be picked up by the next update
+        con = sqlite3.connect(self.database)
+        revision = ProfileChangeLog(con).get_revision()
+        con.close()
+        ingest_embeddings(self.department, self.database)
+        return revision
+
+    def build_lda(self, documents, bigram):
+        # dictionary, LDA model and topic index over every profile, as trained by Similarity on every request before,
+        # along with the sentences of every profile transformed by the phraser
+        dictionary = Dictionary(DocumentCorpus(documents, bigram))
+        model_lda = ldamodel.LdaModel(DocumentCorpus(documents, bigram, dictionary), id2word = dictionary, **LDA_PARAMS)
+        rows = {}
+        topics = []
+        bigram_sentences = {}
+        for link, sentences in documents.iter_profiles():
+            rows[link] = len(topics)
+            bigram_sentences[link] = [bigram[sentence] for sentence in sentences]
+            topics.append(model_lda[dictionary.doc2bow(join_sentences(bigram_sentences[link]))])
+        index = similarities.MatrixSimilarity(topics, num_features = model_lda.num_topics)
+        return {"dictionary": dictionary, "lda": model_lda, "lda_index": index, "lda_rows": rows,
+                "bigram_sentences": bigram_sentences}
+
+    def save(self, revision, models):
+        # models are gensim models, or plain objects to pickle
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        version = "%d-%s" % (revision, datetime.datetime.now().strftime("%Y%m%d%H%M%S%f"))
+        files = {name: "%s.%s" % (name, version) for name in models}
+        for name, model in models.items():
+            if hasattr(model, "save"):
+                # arrays are saved in files of their own to be memory-mapped
+                model.save(os.path.join(self.directory, files[name]), sep_limit = 0)
+            else:
+                with open(os.path.join(self.directory, files[name]), "wb") as f:
+                    pickle.dump(model, f, protocol = 2)
+
+        previous = self.meta
+        self.write_meta({"department": self.department, "revision": revision, "version": version, "files": files,
+                         "profiles": len(models["lda_rows"])})
+
+        # the version before is kept for the requests that read its meta file and have not loaded every model yet,
+        # only the versions older than that are removed, files still mapped by a process stay readable by it
+        kept = list(self.meta["files"].values()) + (list(previous["files"].values()) if previous is not None else [])
+        for filename in os.listdir(self.directory):
+            if not filename.startswith("meta.json") and not any(filename.startswith(name) for name in kept):
+                os.remove(os.path.join(self.directory, filename))
+
+    def write_meta(self, meta):
+        # replace the meta file at once for readers never to see it half written
+        path = os.path.join(self.directory, "meta.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.rename(path + ".tmp", path)
+        self.meta = meta
+
+
+def load_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def get_departments(database = "database.db"):
+    con = sqlite3.connect(database)
+    departments = [row[0] for row in con.execute("select distinct department from profiles where department is not null")]
+    con.close()
+    return departments
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    update = "--update" in args
+    departments = [arg for arg in args if arg != "--update"] or get_departments()
+    for department in departments:
+        models = DepartmentModels(department)
+        trained = models.update() if update else models.train()
+        print("%s: %s" % (department, "saved at revision %d" % models.meta["revision"] if trained else "unchanged"))
@@ -0,0 +1,123 @@
+import numpy as np
+from abc import ABC, abstractmethod
+import pandas as pd
+from .similarity import Similarity
+from .department_models import DepartmentModels
+
+
+def to_numeric(values):
+    # coerce a column to float once, with unknown or non-numeric values as NaN
+    return pd.to_numeric(pd.Series(values), errors = "coerce").values.astype("float64")
+
+
+def difference_score(diff):
+    # 1 - diff / max diff over the known values, NaN where the difference is unknown
+    # a max diff of 0 gives NaN as 0 / 0 does in pandas
+    known = ~np.isnan(diff)
+    if not known.any():
+        return np.full(len(diff), np.nan)
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        return 1 - diff / diff[known].max()
+
+
+class Metric(ABC):
+    # a metric reads its columns from the profiles and adds its score column, between 0 and 1 and NaN when unknown
+    # output_columns are extra columns to show along with the profiles
+    # metrics implement score, and override apply when they add more than their score column
+    def __init__(self, name, score_column, columns, output_columns = None):
+        self.name = name
+        self.score_column = score_column
+        self.columns = columns
+        self.output_columns = output_columns if output_columns is not None else []
+
+    def apply(self, data, nus):
+        data[self.score_column] = self.score(data, nus)
+        return data
+
+    @abstractmethod
+    def score(self, data, nus):
+        # score of every profile against the candidate nus, in the order of data
+        pass
+
+
+class YearMetric(Metric):
+    # closeness of a year to the year of the candidate
+    def __init__(self, name, score_column, year_column, nus_key):
+        Metric.__init__(self, name, score_column, [year_column])
+        self.year_column = year_column
+        self.nus_key = nus_key
+
+    def score(self, data, nus):
+        return difference_score(np.abs(to_numeric(data[self.year_column]) - float(nus[self.nus_key])))
+
+
+class UniversityRankMetric(Metric):
+    # closeness of the rank of the PhD school to the rank of the school of the candidate
+    # resolve_ranks maps a list of school names to their ranks, NaN when unknown and -1 when not found
+    def __init__(self, name, score_column, resolve_ranks):
+        Metric.__init__(self, name, score_column, ["phd_school"])
+        self.resolve_ranks = resolve_ranks
+
+    def score(self, data, nus):
+        nus_rank = self.resolve_ranks([nus["phd_school"]])[0]
+        if not nus_rank >= 0:
+            return np.full(len(data), np.nan)
+
+        # resolve every distinct school once, with missing schools as unknown
+        codes, schools = pd.factorize(data["phd_school"])
+        school_rank = np.append(np.array(self.resolve_ranks(list(schools)), dtype = "float64"), np.nan)
+        rank = school_rank[codes]
+        return difference_score(np.where(rank != -1, np.abs(rank - nus_rank), np.nan))
+
+
+class ResearchMetric(Metric):
+    # research area similarity to the candidate, computed over the whole department at once
+    def __init__(self, name, score_column):
+        # the revision tells the profiles changed since the models of the department were saved
+        Metric.__init__(self, name, score_column, ["text_raw", "research_sentences", "research_keywords", "keyword_vectors",
+                                                   "revision"], output_columns = ["keywords"])
+
+    def apply(self, data, nus):
+        # the similarity adds the keywords and the scores of every sentence along with the score column, and
+        # returns the tagged profiles only
+        # use the models saved for the department once they have been trained
+        models = DepartmentModels(nus["department"])
+        sim = Similarity(data, models = models if models.is_trained() else None)
+        sim.add_nus_info(pd.DataFrame.from_dict([nus]))
+        return sim.get_avg_score()
+
+    def score(self, data, nus):
+        # NaN for the profiles left out by the similarity
+        return self.apply(data, nus)[self.score_column].reindex(data.index).values
+
+
+class MetricEngine:
+    # score profiles by the metrics selected and combine them into a final score by weighted mean,
+    # leaving out the metrics unknown for each profile
+    def __init__(self, metrics):
+        self.metrics = {}
+        for metric in metrics:
+            self.register(metric)
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def get_columns(self, names):
+        # profile columns needed by the metrics, in order and once each
+        columns = []
+        for name in names:
+            columns += [col for col in self.metrics[name].columns if col not in columns]
+        return columns
+
+    def score(self, data, nus, names, weights = None):
+        names = [name for index, name in enumerate(names) if name not in names[:index]]
+        for name in names:
+            data = self.metrics[name].apply(data, nus)
+
+        weights = weights if weights is not None else {}
+        weight = np.array([float(weights.get(name, 1)) for name in names])
+        scores = data[[self.metrics[name].score_column for name in names]].values.astype("float64")
+        known = ~np.isnan(scores)
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            data["final_score"] = (np.where(known, scores, 0) * weight).sum(axis = 1) / (known * weight).sum(axis = 1)
+        return data
@@ -1,7 +1,6 @@
 import pandas as pd
-from .similarity import Similarity
-from fuzzywuzzy import process
-import numpy as np
+from .metrics import MetricEngine, YearMetric, UniversityRankMetric, ResearchMetric
+from .uni_rank import UniversityRankResolver
 from datetime import datetime
 import sqlite3
 import os
@@ -12,22 +11,53 @@ if int(sys.version[0]) < 3:
     sys.setdefaultencoding("utf-8")
 
 
-def get_uni_rank(uni, uni_dict):
-    if uni == "Unknown":
-        return np.nan
-    best_match = process.extractOne(uni, uni_dict.keys())
-    if best_match[1] >= 90:  # similar enough
-        return uni_dict[best_match[0]]
-    else:
-        return -1
-
 #DATA_FILENAME = "./crawler/data/SAMPLE_JSON.json"
 UNI_FILENAME = "./crawler/data/UNIVERSITY_LINK.json"
 
+# columns shown in the preview and the export, text_raw included as the preview shows it for every profile,
+# the metrics read the columns they need on top of them
+DISPLAY_COLUMNS = ["name", "department", "university", "tag", "position", "phd_year", "phd_school", "promotion_year",
+                   "text_raw", "profile_link"]
+SCORING_COLUMNS = ["research_sentences", "research_keywords", "keyword_vectors", "revision"]
+ALL_METRICS = ["PHD YEAR", "PHD UNIVERSITY", "RESEARCH AREA SIMILARITY", "PROMO YEAR"]
+
+# university rank table and its resolver shared by every benchmark request, keyed by file name with the time it
+# was modified
+UNI_RANK_CACHE = {}
+
+
+def load_uni_rank(filename=UNI_FILENAME):
+    # read the rank table again only when the file has changed since it was last read
+    modified = os.path.getmtime(filename)
+    cached = UNI_RANK_CACHE.get(filename)
+    if cached is None or cached[0] != modified:
+        uni_rank = pd.read_json(filename, orient = "index")["Rank"].apply(lambda x: int(x.split("=")[-1])).to_dict()
+        UNI_RANK_CACHE[filename] = (modified, uni_rank, UniversityRankResolver(uni_rank))
+    return UNI_RANK_CACHE[filename][1]
+
+
+def get_uni_rank_resolver(filename=UNI_FILENAME):
+    load_uni_rank(filename)
+    return UNI_RANK_CACHE[filename][2]
+
+
+def get_uni_rank_list(uni_list):
+    # schools are matched once and remembered across requests
+    return get_uni_rank_resolver().get_ranks(uni_list)
+
+
+# more metrics can be registered to the engine and selected by name
+METRIC_ENGINE = MetricEngine([
+    YearMetric("PHD YEAR", "phd_year_score", "phd_year_int", "phd_year"),
+    UniversityRankMetric("PHD UNIVERSITY", "phd_school_score", get_uni_rank_list),
+    ResearchMetric("RESEARCH AREA SIMILARITY", "research_area_score"),
+    YearMetric("PROMO YEAR", "promotion_year_score", "promotion_year_int", "promotion_year")
+])
+
 
 class Rank:
 
-    def __init__(self, nus):
+    def __init__(self, nus, metrics = ALL_METRICS, weights = None):
         # nus = {u'department': u'Geography',
         #              u'name': u'Prof Clive Agnew research profile - personal details   ',
         #              u'phd_school': u'University of East Anglia, School of Development Studies',
@@ -41,39 +71,28 @@ class Rank:
         # metrics = ["PHD YEAR", "PHD UNIVERSITY", "RESEARCH AREA SIMILARITY", "PROMO YEAR"]
         #self.data = pd.read_json(DATA_FILENAME)
         print(os.getcwd())
+        # load only the profiles of the department and position, with only the columns the metrics need
+        self.metrics = metrics
+        self.weights = weights
+        columns = DISPLAY_COLUMNS + [col for col in METRIC_ENGINE.get_columns(metrics) if col not in DISPLAY_COLUMNS]
         con = sqlite3.connect("database.db")
-        self.data = pd.read_sql("select * from profiles", con)
-        self.university = pd.read_json(UNI_FILENAME, orient = "index")["Rank"].apply(lambda x: int(x.split("=")[-1])).to_dict()
-        self.cols = self.data.columns.tolist()
+        self.data = pd.read_sql("select %s from profiles where department = ? and position = ?" % ", ".join(columns),
+                                con, params = (nus["department"], nus["position"]))
+        con.close()
+        # typed year columns, embedded research areas and revisions are only used for scoring
+        self.cols = [col for col in columns if not col.endswith("_int") and col not in SCORING_COLUMNS]
         self.nus = nus
-        self.data = self.data[(self.data["department"] == nus["department"]) & (self.data["position"] == nus["position"])]
         self.data["name"] = self.data["name"].str.title()
-        self.promo = False
-        self.phd = False
-        self.phdUni = False
-        self.research = False
 
-    def get_rank_scores(self, metrics = ["PHD YEAR", "PHD UNIVERSITY", "RESEARCH AREA SIMILARITY", "PROMO YEAR"]):
-        scores = []
+    def get_rank_scores(self, metrics = None, weights = None):
+        # score with the metric engine, weighting every metric equally unless weights are given by metric name
+        if metrics is None:
+            metrics = self.metrics
+        if weights is None:
+            weights = self.weights
+        self.data = METRIC_ENGINE.score(self.data, self.nus, metrics, weights)
         for l in metrics:
-            if l == "PHD YEAR":
-                scores.append("phd_year_score")
-                if self.phd == False:
-                    self.get_phd_year_score()
-            if l == "PHD UNIVERSITY":
-                scores.append("phd_school_score")
-                if self.phdUni == False:
-                    self.get_phd_uni_score()
-            if l == "PROMO YEAR":
-                scores.append("promotion_year_score")
-                if self.promo == False:
-                    self.get_promo_year_score()
-            if l ==  "RESEARCH AREA SIMILARITY":
-                scores.append("research_area_score")
-                if self.research == False:
-                    self.get_research_sim_score()
-                self.cols.append("keywords")
-        self.data["final_score"] = self.data[scores].mean(axis = 1)
+            self.cols += [col for col in METRIC_ENGINE.metrics[l].output_columns if col not in self.cols]
         self.cols.append("final_score")
 
 
@@ -101,43 +120,13 @@ class Rank:
         self.data[self.data["tag"] == "aspirant"].sort_values("final_score", ascending = False)[self.cols].to_excel(writer, sheet_name= "ASPIRANT", index = False)
         writer.close()
 
-    def get_phd_year_score(self):
-        self.data["phd_year_diff"] = self.data["phd_year"].apply(lambda x: abs(int(x) - self.nus["phd_year"]) if x != "Unknown" else np.nan)
-        max_diff = self.data["phd_year_diff"].max()
-        self.data["phd_year_score"] = self.data["phd_year_diff"].apply(lambda x: 1 - x / max_diff)
-        self.phd = True
-
-    def get_promo_year_score(self):
-        self.data["promotion_year_diff"] = self.data["promotion_year"].apply(lambda x: abs(int(x) - self.nus["promotion_year"]) if x != "Unknown" else np.nan)
-        max_diff = self.data["promotion_year_diff"].max()
-        self.data["promotion_year_score"] = self.data["promotion_year_diff"].apply(lambda x: 1 - x / max_diff)
-        self.promo = True
-
-    def get_phd_uni_score(self):
-        nus_rank = get_uni_rank(self.nus["phd_school"], self.university)
-        if nus_rank >= 0:
-            self.data["phd_school_rank"] = self.data["phd_school"].apply(lambda x: get_uni_rank(x, self.university))
-            self.data["phd_school_rank_diff"] = np.where(self.data["phd_school_rank"] != -1,
-                                                          abs(self.data["phd_school_rank"] - nus_rank),
-                                                          np.nan)
-            max_diff = self.data["phd_school_rank_diff"].max()
-            self.data["phd_school_score"] = self.data["phd_school_rank_diff"].apply(lambda x: 1 - x / max_diff)
-        else:
-            self.data["phd_school_score"] = np.nan
-        self.phdUni = True
-
-    def get_research_sim_score(self):
-        sim = Similarity(self.data)
-        nus_df = pd.DataFrame.from_dict([self.nus])
-        sim.add_nus_info(nus_df)
-        self.data = sim.get_avg_score()
-        self.research = True
-
-
-
-def run_benchmarker(nus, metrics):
-    rank = Rank(nus)
+
+
+def run_benchmarker(nus, metrics, weights = None, save_ranks = False):
+    rank = Rank(nus, metrics, weights)
     rank.get_rank_scores(metrics)
+    if save_ranks: # keep the resolved school ranks of the department in profiles
+        get_uni_rank_resolver().save_profile_ranks(nus["department"])
     rank.export_ranked_result()
     return rank.get_top_preview()# [peer_dataframe, aspirant_df]
 
@@ -0,0 +1,55 @@
+import json
+import sqlite3
+import sys
+import numpy as np
+from crawler.utils.model_registry import MODEL_REGISTRY
+from crawler.utils.profile_schema import migrate_profiles
+from .similarity import SPACY_MODEL, SPACY_DISABLE, separate_sentence, get_keywords, get_keyword_matrix
+
+# embed the research area of the profiles crawled, so that the benchmarker only parses the query
+# example (from the integrated directory): python -m benchmarker.research_embeddings Geography
+BATCH_SIZE = 256
+
+
+def embed_research(doc):
+    # lemmatized sentences, keywords, document vector and unit keyword vectors of a parsed research area
+    keywords = get_keywords(doc)
+    return {"research_sentences": json.dumps(separate_sentence(doc)),
+            "research_keywords": json.dumps([keyword.text for keyword in keywords]),
+            "research_vector": np.asarray(doc.vector, dtype = "float32").tobytes(),
+            "keyword_vectors": get_keyword_matrix(keywords).tobytes()}
+
+
+def ingest_embeddings(department = None, database = "database.db", batch_size = BATCH_SIZE):
+    # embed every profile not embedded yet, of a department or of all of them, committing batch by batch
+    # profiles are embedded again once their text is crawled or edited, as that clears the columns
+    con = sqlite3.connect(database)
+    migrate_profiles(con)
+    query = "select profile_link, text_raw from profiles where research_vector is null"
+    params = ()
+    if department is not None:
+        query += " and department = ?"
+        params = (department, )
+    profiles = con.execute(query, params).fetchall()
+
+    nlp = MODEL_REGISTRY.get_spacy_model(SPACY_MODEL, disable = SPACY_DISABLE)
+    for i in range(0, len(profiles), batch_size):
+        batch = profiles[i:i + batch_size]
+        # unknown research areas are embedded as empty text, as in Similarity
+        docs = nlp.pipe([text if text not in [None, "Unknown"] else u"" for _, text in batch], batch_size = batch_size)
+        rows = []
+        for (link, _), doc in zip(batch, docs):
+            embedding = embed_research(doc)
+            rows.append((embedding["research_sentences"], embedding["research_keywords"],
+                         embedding["research_vector"], embedding["keyword_vectors"], link))
+        con.executemany("update profiles set research_sentences = ?, research_keywords = ?, research_vector = ?, "
+                        "keyword_vectors = ? where profile_link = ?", rows)
+        con.commit()
+    con.close()
+    return len(profiles)
+
+
+if __name__ == "__main__":
+    departments = sys.argv[1:] or [None]
+    for department in departments:
+        print("%s: %d profiles embedded" % (department or "all departments", ingest_embeddings(department)))
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import sys
+import time
+from benchmarker.metrics import MetricEngine, YearMetric, UniversityRankMetric
+
+# micro-benchmark of the metric engine against the per-row scoring it replaces, over generated profiles
+# school ranks are looked up exactly in both so that only the scoring itself is timed
+# example (from the integrated directory): python -m benchmarker.scripts.benchmark_metrics 100000
+
+SCHOOLS = ["University %d" % i for i in range(500)]
+SCHOOL_RANK = {school: rank + 1 for rank, school in enumerate(SCHOOLS)}
+METRICS = ["PHD YEAR", "PHD UNIVERSITY", "PROMO YEAR"]
+
+
+def get_school_rank(school):
+    if school == "Unknown":
+        return np.nan
+    return SCHOOL_RANK.get(school, -1)
+
+
+def generate_profiles(n, seed = 124):
+    np.random.seed(seed)
+    phd_year = np.random.randint(1960, 2018, n).astype(str).astype(object)
+    phd_year[np.random.rand(n) < 0.2] = "Unknown"
+    promotion_year = np.random.randint(1980, 2018, n).astype(str).astype(object)
+    promotion_year[np.random.rand(n) < 0.3] = "Unknown"
+    phd_school = np.array(SCHOOLS + ["Unknown", "Not Ranked College"], dtype = object)[
+        np.random.randint(0, len(SCHOOLS) + 2, n)]
+    data = pd.DataFrame({"phd_year": phd_year, "promotion_year": promotion_year, "phd_school": phd_school})
+    data["phd_year_int"] = pd.to_numeric(data["phd_year"], errors = "coerce")
+    data["promotion_year_int"] = pd.to_numeric(data["promotion_year"], errors = "coerce")
+    return data
+
+
+def score_per_row(data, nus):
+    # scoring as done by Rank before the metric engine
+    data["phd_year_diff"] = data["phd_year"].apply(lambda x: abs(int(x) - nus["phd_year"]) if x != "Unknown" else np.nan)
+    max_diff = data["phd_year_diff"].max()
+    data["phd_year_score"] = data["phd_year_diff"].apply(lambda x: 1 - x / max_diff)
+
+    nus_rank = get_school_rank(nus["phd_school"])
+    data["phd_school_rank"] = data["phd_school"].apply(get_school_rank)
+    data["phd_school_rank_diff"] = np.where(data["phd_school_rank"] != -1, abs(data["phd_school_rank"] - nus_rank),
+                                            np.nan)
+    max_diff = data["phd_school_rank_diff"].max()
+    data["phd_school_score"] = data["phd_school_rank_diff"].apply(lambda x: 1 - x / max_diff)
+
+    data["promotion_year_diff"] = data["promotion_year"].apply(
+        lambda x: abs(int(x) - nus["promotion_year"]) if x != "Unknown" else np.nan)
+    max_diff = data["promotion_year_diff"].max()
+    data["promotion_year_score"] = data["promotion_year_diff"].apply(lambda x: 1 - x / max_diff)
+
+    data["final_score"] = data[["phd_year_score", "phd_school_score", "promotion_year_score"]].mean(axis = 1)
+    return data
+
+
+def run_benchmark(n = 100000, repeat = 3):
+    engine = MetricEngine([
+        YearMetric("PHD YEAR", "phd_year_score", "phd_year_int", "phd_year"),
+        UniversityRankMetric("PHD UNIVERSITY", "phd_school_score", lambda schools: [get_school_rank(x) for x in schools]),
+        YearMetric("PROMO YEAR", "promotion_year_score", "promotion_year_int", "promotion_year")
+    ])
+    nus = {"phd_year": 1995, "phd_school": SCHOOLS[42], "promotion_year": 2017}
+    data = generate_profiles(n)
+
+    timing = {}
+    result = {}
+    for mode, score in [("per row", lambda x: score_per_row(x, nus)), ("engine", lambda x: engine.score(x, nus, METRICS))]:
+        start = time.time()
+        for _ in range(repeat):
+            result[mode] = score(data.copy())
+        timing[mode] = (time.time() - start) * 1000 / repeat
+        print("%s: %.1f ms for %d profiles" % (mode, timing[mode], n))
+
+    same = np.allclose(result["per row"]["final_score"].values, result["engine"]["final_score"].values, equal_nan = True)
+    print("speedup: %.1fx, same final scores: %s" % (timing["per row"] / timing["engine"], same))
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
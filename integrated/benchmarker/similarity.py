@@ -1,11 +1,23 @@
+import json
 import numpy as np
+import pandas as pd
 from gensim.corpora import Dictionary
 from gensim.models import ldamodel
-from gensim import similarities
+from gensim import similarities, matutils
 from gensim.models.phrases import Phrases, Phraser
 from spacy.en.language_data import STOP_WORDS
-import spacy
 from gensim.models import Word2Vec
+from crawler.utils.model_registry import MODEL_REGISTRY
+from .corpus import SentenceCorpus, DocumentCorpus, join_sentences
+
+# the named entity recognizer is not used to compare research areas
+SPACY_MODEL = "en_core_web_md"
+SPACY_DISABLE = ["entity"]
+
+
+# load the models used by Similarity ahead of the first benchmark, shared by every request of the process
+def preload_models():
+    MODEL_REGISTRY.get_spacy_model(SPACY_MODEL, disable = SPACY_DISABLE)
 
 
 # to identify each noun phrase as a keyword/phrase to be compared for similarities
@@ -49,6 +61,33 @@ def get_similarity(keyword_1, keyword_2):
         return sum(score) / len(score)
     return 0
 
+# keyword vectors scaled to unit length in float32, rows of zeros for keywords without vectors
+def get_keyword_matrix(keywords):
+    matrix = np.zeros((len(keywords), keywords[0].vector.shape[0] if len(keywords) > 0 else 0), dtype = "float32")
+    for row, keyword in enumerate(keywords):
+        if keyword.vector_norm != 0:
+            matrix[row] = keyword.vector / keyword.vector_norm
+    return matrix
+
+
+# keyword vectors stored as float32 bytes, one row per keyword
+def read_keyword_matrix(blob, n_keywords):
+    if n_keywords == 0:
+        return np.zeros((0, 0), dtype = "float32")
+    return np.frombuffer(blob, dtype = "float32").reshape(n_keywords, -1)
+
+
+# get_similarity over keyword matrices, through a single matrix product
+def get_matrix_similarity(matrix_1, matrix_2):
+    if len(matrix_1) == 0 or len(matrix_2) == 0:
+        return 0
+    score = matrix_1.dot(matrix_2.T).max(axis = 1)
+    score = score[score != 0]
+    if len(score) > 0:
+        return float(score.mean())
+    return 0
+
+
 def get_n_avg(ls, n):
     assert n <= len(ls)
     total = sum(sorted(ls, reverse = False)[:n])
@@ -58,8 +97,11 @@ def get_n_avg(ls, n):
 # calculate the cosine similarities between the different sentences in each row
 # if the research area text contains more than 1 sentence, compare the sentence by pair for all combinations
 # and take the max score
+# words the model has not been trained on are left out, as with models saved before the profiles were written
 def get_n_similarity(sentences_1, sentences_2, model):
     score = 0
+    sentences_1 = [[word for word in s if word in model.wv.vocab] for s in sentences_1]
+    sentences_2 = [[word for word in s if word in model.wv.vocab] for s in sentences_2]
     for s1 in sentences_1:
         for s2 in sentences_2:
             try:
@@ -72,12 +114,14 @@ def get_n_similarity(sentences_1, sentences_2, model):
 
 
 class Similarity:
-    def __init__(self, data, seed = 124):
+    # models are the DepartmentModels saved for the department, if any, to use instead of training on the data
+    def __init__(self, data, seed = 124, models = None):
         self.data = data.copy()
         self.data["text_raw"] = self.data["text_raw"].apply(lambda x: x if x != "Unknown" else u"")
             #lambda x: '. '.join(y.lstrip('()0123456789.-') for y in x.split('\n')) if x != "Unknown" else "")
-        self.nlp = spacy.load("en_core_web_md")
+        self.nlp = MODEL_REGISTRY.get_spacy_model(SPACY_MODEL, disable = SPACY_DISABLE)
         self.seed = seed
+        self.models = models
         self.lda_score = False
         self.keyword_score = False
         self.word2vec_score = False
@@ -91,17 +135,41 @@ class Similarity:
     def apply_nlp(self):
         self.data["nlp"] = self.data["text_raw"].apply(lambda x:self.nlp(x))
 
+    def apply_sentences(self):
+        # sentences of the profiles are stored at ingest, only the query and the profiles not embedded yet are parsed
+        if "research_sentences" not in self.data.columns.tolist():
+            if "nlp" not in self.data.columns.tolist():
+                self.apply_nlp()
+            self.data["sentences"] = self.data["nlp"].apply(separate_sentence)
+            return
+        self.data["sentences"] = pd.Series(
+            [json.loads(saved) if isinstance(saved, str) else separate_sentence(self.nlp(text))
+             for text, saved in zip(self.data["text_raw"], self.data["research_sentences"])], index = self.data.index)
+
     def apply_bigram(self):
-        if "nlp" not in self.data.columns.tolist():
-            self.apply_nlp()
-        self.data["sentences"] = self.data["nlp"].apply(separate_sentence)
-        phrases = Phrases(self.data["sentences"].sum())
-        bigram = Phraser(phrases)
+        if "sentences" not in self.data.columns.tolist():
+            self.apply_sentences()
+        # use the phrases saved for the department if any, with the sentences of the profiles saved transformed along
+        # with them, only transforming the query and the profiles written or changed since
+        if self.models is not None:
+            bigram = self.models.phraser
+            saved = self.models.bigram_sentences
+            self.data["sentences_bigram"] = pd.Series(
+                [saved[link] if is_saved else [bigram[sentence] for sentence in doc]
+                 for link, is_saved, doc in zip(self.data["profile_link"], self.get_saved_rows(saved),
+                                                self.data["sentences"])], index = self.data.index)
+            return
+        bigram = Phraser(Phrases(SentenceCorpus(self.data["sentences"])))
         self.data["sentences_bigram"] = self.data["sentences"].apply(
             lambda doc: [bigram[sentence] for sentence in doc])
 
     def get_nlp_score(self):
         if self.keyword_score == False:
+            if "keyword_vectors" in self.data.columns.tolist():
+                self.get_saved_nlp_score()
+                return
+            if "nlp" not in self.data.columns.tolist():
+                self.apply_nlp()
             self.data["keywords"] = self.data["nlp"].apply(get_keywords)
             # compare the similarities of each row to the first row
             self.data["keyword_score"] = self.data["keywords"].apply(
@@ -109,10 +177,32 @@ class Similarity:
             self.keyword_score = True
 
 
+    def get_saved_nlp_score(self):
+        # keywords of the profiles are embedded at ingest, only the query and the profiles not embedded yet are parsed
+        keywords = []
+        matrices = []
+        for text, saved_keywords, saved_vectors in zip(self.data["text_raw"], self.data["research_keywords"],
+                                                       self.data["keyword_vectors"]):
+            if isinstance(saved_vectors, bytes):
+                keywords.append(json.loads(saved_keywords))
+                matrices.append(read_keyword_matrix(saved_vectors, len(keywords[-1])))
+            else:
+                spans = get_keywords(self.nlp(text))
+                keywords.append([span.text for span in spans])
+                matrices.append(get_keyword_matrix(spans))
+        nus_matrix = matrices[np.where(self.data["tag"].isnull().values)[0][0]]
+        self.data["keywords"] = pd.Series(keywords, index = self.data.index)
+        self.data["keyword_score"] = [get_matrix_similarity(nus_matrix, matrix) for matrix in matrices]
+        self.keyword_score = True
+
     def get_word2vec_score(self):
         if self.word2vec_score == False:
-            self.apply_bigram()
-            model = Word2Vec(self.data["sentences_bigram"].sum(), min_count=1, iter=200)
+            if "sentences_bigram" not in self.data.columns.tolist():
+                self.apply_bigram()
+            if self.models is not None:
+                model = self.models.word2vec
+            else:
+                model = Word2Vec(SentenceCorpus(self.data["sentences_bigram"]), min_count=1, iter=200)
             # use gensim phrases and phrases to model bigram
             self.data["word2vec_score"] = self.data["sentences_bigram"].apply(
                 lambda x: get_n_similarity(self.data[self.data["tag"].isnull()]["sentences_bigram"][0], x, model))
@@ -122,13 +212,16 @@ class Similarity:
         if self.lda_score == False:
             if "sentences_bigram" not in self.data.columns.tolist():
                 self.apply_bigram()
-            dictionary = Dictionary([sum(sentences, []) for sentences in self.data["sentences_bigram"]])
-            corpus = [dictionary.doc2bow(sum(sentences, [])) for sentences in self.data["sentences_bigram"]]
+            if self.models is not None and self.models.has_lda():
+                self.get_saved_lda_score()
+                return
+            dictionary = Dictionary(DocumentCorpus(self.data["sentences_bigram"]))
+            corpus = DocumentCorpus(self.data["sentences_bigram"], dictionary = dictionary)
 
             np.random.seed(self.seed)  # setting random seed to get the same results each time.
             model_lda = ldamodel.LdaModel(corpus, id2word = dictionary, num_topics=25)
 
-            doc = dictionary.doc2bow(sum(self.data[self.data["tag"].isnull()]["sentences_bigram"][0], []))
+            doc = dictionary.doc2bow(join_sentences(self.data[self.data["tag"].isnull()]["sentences_bigram"][0]))
             doc_lda = model_lda[doc]
             # find the most similar documents from all the documents in the corpus
             index = similarities.MatrixSimilarity(model_lda[corpus])
@@ -136,6 +229,33 @@ class Similarity:
             self.data["lda_score"] = index[doc_lda]
             self.lda_score = True
 
+    def get_saved_lda_score(self):
+        # fold the query into the saved LDA model and look its topics up in the saved index of the department
+        dictionary = self.models.dictionary
+        doc_lda = self.models.get_topics(
+            dictionary.doc2bow(join_sentences(self.data[self.data["tag"].isnull()]["sentences_bigram"][0])), self.seed)
+        index_score = self.models.lda_index[doc_lda]
+        rows = self.models.lda_rows
+        # profiles written or changed since the model was saved are folded in as well
+        self.data["lda_score"] = [
+            index_score[rows[link]] if saved else
+            matutils.cossim(doc_lda, self.models.get_topics(dictionary.doc2bow(join_sentences(sentences)), self.seed))
+            for link, saved, sentences in zip(self.data["profile_link"], self.get_saved_rows(rows),
+                                              self.data["sentences_bigram"])]
+        self.lda_score = True
+
+    def get_saved_rows(self, rows):
+        # whether each profile can be read from the saved models, being in rows and unchanged since the revision
+        # they were saved at, profiles without a revision were written before the change log and are unchanged
+        # the query never is
+        if "revision" in self.data.columns.tolist():
+            unchanged = (self.data["revision"].fillna(0) <= self.models.meta["revision"]).values
+        else:
+            unchanged = np.ones(len(self.data), dtype = bool)
+        return [link in rows and bool(current) and is_profile
+                for link, current, is_profile in zip(self.data["profile_link"], unchanged,
+                                                     self.data["tag"].notnull().values)]
+
     def get_all_scores(self):
         self.get_lda_score()
         self.get_nlp_score()
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import sqlite3
+import numpy as np
+from fuzzywuzzy import process, utils
+from crawler.utils.profile_schema import migrate_profiles
+
+
+class UniversityRankResolver:
+    # resolve school names to the rank of the best matching university in the rank table, scoring every distinct
+    # school once across requests
+    # a school is looked up first in the index of university names normalized as fuzzywuzzy compares them, where
+    # a hit scores 100, and is matched by process.extractOne otherwise as before
+    # results are kept in memory and in SQLite for the version of the rank table they are resolved against
+
+    MATCH_THRESHOLD = 90
+
+    def __init__(self, uni_dict, database = "database.db"):
+        self.uni_dict = {name: int(rank) for name, rank in uni_dict.items()}
+        self.database = database
+        self.version = hashlib.md5(json.dumps(sorted(self.uni_dict.items())).encode("utf-8")).hexdigest()
+
+        # the first name in the table wins a tie, as in process.extractOne
+        self.alias = {}
+        for name in self.uni_dict:
+            self.alias.setdefault(utils.full_process(name, force_ascii = True), name)
+
+        # the school_ranks table is declared in schema.sql and added by migrate_db to databases created before
+        con = sqlite3.connect(self.database)
+        con.execute("delete from school_ranks where table_version != ?", (self.version, ))
+        con.commit()
+        self.resolved = {row[0]: tuple(row[1:]) for row in con.execute(
+            "select school, matched_name, rank, score from school_ranks where table_version = ?", (self.version, ))}
+        con.close()
+
+    def match(self, school):
+        # (matched name, rank, score) of the school, with rank -1 when the score is below the threshold
+        alias = self.alias.get(utils.full_process(utils.full_process(school), force_ascii = True))
+        if alias is not None:
+            return alias, self.uni_dict[alias], 100
+        best_match = process.extractOne(school, self.uni_dict.keys())
+        rank = self.uni_dict[best_match[0]] if best_match[1] >= self.MATCH_THRESHOLD else -1
+        return best_match[0], rank, best_match[1]
+
+    def resolve_list(self, schools):
+        # resolve the distinct schools not seen before and save them for later requests
+        new = {}
+        for school in set(schools):
+            if self.is_known(school) and school not in self.resolved:
+                new[school] = self.match(school)
+        if len(new) > 0:
+            con = sqlite3.connect(self.database)
+            con.executemany("insert or replace into school_ranks (school, table_version, matched_name, rank, score) "
+                            "values (?, ?, ?, ?, ?)",
+                            [(school, self.version) + result for school, result in new.items()])
+            con.commit()
+            con.close()
+            self.resolved.update(new)
+
+    def get_ranks(self, schools):
+        # rank of every school, NaN when unknown and -1 when not in the rank table
+        self.resolve_list(schools)
+        return [self.resolved[school][1] if self.is_known(school) else np.nan for school in schools]
+
+    def save_profile_ranks(self, department = None):
+        # write the rank of the PhD school into profiles, of a department or of all of them, NULL when unknown
+        con = sqlite3.connect(self.database)
+        migrate_profiles(con)
+        condition = " and department = ?" if department is not None else ""
+        params = (department, ) if department is not None else ()
+        schools = [row[0] for row in con.execute("select distinct phd_school from profiles where 1 = 1" + condition,
+                                                 params)]
+        ranks = self.get_ranks(schools)
+        con.executemany("update profiles set phd_school_rank = ? where phd_school = ?" + condition,
+                        [(None if np.isnan(rank) else rank, school) + params
+                         for school, rank in zip(schools, ranks) if school is not None])
+        con.commit()
+        con.close()
+        return len(schools)
+
+    @staticmethod
+    def is_known(school):
+        return isinstance(school, str) and school != "Unknown"
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# Persistent HTTP cache for repeated crawls of the same departments
+#
+# Responses are stored on disk with their ETag/Last-Modified headers so that the RFC2616 policy sends
+# conditional requests on later runs and serves 304 responses from the cache
+# See: http://scrapy.readthedocs.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
+
+import os
+import shutil
+from collections import OrderedDict
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.extensions.httpcache import FilesystemCacheStorage
+
+
+class BoundedFilesystemCacheStorage(FilesystemCacheStorage):
+
+    # Filesystem storage bounded by HTTPCACHE_SIZE_LIMIT bytes (0 for no limit), evicting the least
+    # recently used responses. Recency is kept in the modification time of each response directory
+    # so that it carries over to the next run
+
+    def __init__(self, settings):
+        super(BoundedFilesystemCacheStorage, self).__init__(settings)
+        self.size_limit = settings.getint('HTTPCACHE_SIZE_LIMIT')
+        self.entries = OrderedDict()
+        self.total_size = 0
+
+    def open_spider(self, spider):
+        super(BoundedFilesystemCacheStorage, self).open_spider(spider)
+
+        # Load the responses stored by previous runs from the least to the most recently used
+        spider_path = os.path.join(self.cachedir, spider.name)
+        entry_list = []
+        if os.path.isdir(spider_path):
+            for prefix in os.listdir(spider_path):
+                prefix_path = os.path.join(spider_path, prefix)
+                for key in os.listdir(prefix_path):
+                    rpath = os.path.join(prefix_path, key)
+                    entry_list.append((os.path.getmtime(rpath), rpath, self.get_directory_size(rpath)))
+        for _, rpath, size in sorted(entry_list):
+            self.entries[rpath] = size
+            self.total_size += size
+        self.evict()
+
+    def retrieve_response(self, spider, request):
+        response = super(BoundedFilesystemCacheStorage, self).retrieve_response(spider, request)
+        if response is not None:
+            rpath = self._get_request_path(spider, request)
+            if rpath in self.entries:
+                self.entries.move_to_end(rpath)
+            os.utime(rpath, None)
+        return response
+
+    def store_response(self, spider, request, response):
+        super(BoundedFilesystemCacheStorage, self).store_response(spider, request, response)
+        rpath = self._get_request_path(spider, request)
+        self.total_size -= self.entries.pop(rpath, 0)
+        self.entries[rpath] = self.get_directory_size(rpath)
+        self.total_size += self.entries[rpath]
+        self.evict()
+
+    def evict(self):
+        # Remove the least recently used responses until the cache fits in the size limit
+        while self.size_limit > 0 and self.total_size > self.size_limit and len(self.entries) > 0:
+            rpath, size = self.entries.popitem(last=False)
+            shutil.rmtree(rpath, ignore_errors=True)
+            self.total_size -= size
+
+    @staticmethod
+    def get_directory_size(path):
+        return sum(os.path.getsize(os.path.join(path, file_name)) for file_name in os.listdir(path))
+
+
+class HttpCacheStatsMiddleware(HttpCacheMiddleware):
+
+    # HTTP cache middleware that also reports the hit ratio and the cache size in the crawl stats
+    # Responses served from the cache include fresh hits and those revalidated with a 304 response
+
+    def spider_closed(self, spider):
+        hit = self.stats.get_value('httpcache/hit', 0, spider=spider)
+        revalidate = self.stats.get_value('httpcache/revalidate', 0, spider=spider)
+        lookup = hit + revalidate + self.stats.get_value('httpcache/miss', 0, spider=spider) + \
+            self.stats.get_value('httpcache/invalidate', 0, spider=spider)
+        self.stats.set_value('httpcache/hit_ratio', float(hit + revalidate) / lookup if lookup > 0 else 0.0,
+                             spider=spider)
+        if isinstance(self.storage, BoundedFilesystemCacheStorage):
+            self.stats.set_value('httpcache/size', self.storage.total_size, spider=spider)
+        super(HttpCacheStatsMiddleware, self).spider_closed(spider)
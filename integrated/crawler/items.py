@@ -27,3 +27,16 @@ class ProfilePageItem(Item):
     promotion_year = Field(output_processor=TakeFirst())
     profile_link = Field(output_processor=TakeFirst())
     text_raw = Field(output_processor=TakeFirst())
+    content_hash = Field(output_processor=TakeFirst())
+
+
+class ProfileSeenItem(Item):
+    # Profile page fetched again with unchanged main text, only marked as seen in the database
+    profile_link = Field(output_processor=TakeFirst())
+    content_hash = Field(output_processor=TakeFirst())
+
+
+class ProfileRejectedItem(Item):
+    # Possible profile page found not to be of a professor, recorded to be skipped while it stays unchanged
+    profile_link = Field(output_processor=TakeFirst())
+    content_hash = Field(output_processor=TakeFirst())
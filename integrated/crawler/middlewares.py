@@ -5,7 +5,8 @@
 # See documentation in:
 # http://doc.scrapy.org/en/latest/topics/spider-middleware.html
 
-from scrapy import signals
+from scrapy import signals, Request
+from scrapy.spidermiddlewares.depth import DepthMiddleware
 
 
 class CrawlerSpiderMiddleware(object):
@@ -54,3 +55,27 @@ class CrawlerSpiderMiddleware(object):
 
     def spider_opened(self, spider):
         spider.logger.info('Spider opened: %s' % spider.name)
+
+
+class SameDepthMiddleware(DepthMiddleware):
+
+    # Depth middleware giving the requests with 'Same Depth' set in meta the depth of the response they come
+    # from rather than one more, for requests that stand for the same page such as its iframes, its XML version
+    # and the resumes of a profile, so that they are not dropped at the depth limit
+    # The depth of the response is left untouched for the other requests it yields
+
+    def process_spider_output(self, response, result, spider):
+        for output in result or ():
+            source = response
+            if isinstance(output, Request) and output.meta.pop('Same Depth', False):
+                source = DepthSource(response.meta.get('depth', 0) - 1)
+            for filtered in super(SameDepthMiddleware, self).process_spider_output(source, [output], spider):
+                yield filtered
+
+
+class DepthSource(object):
+
+    # Stands for the response a request is counted one level deeper from
+
+    def __init__(self, depth):
+        self.meta = {'depth': depth}
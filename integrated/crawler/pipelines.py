@@ -5,20 +5,67 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: http://doc.scrapy.org/en/latest/topics/item-pipeline.html
 
+import datetime
 import os
 import sqlite3
+import time
+from twisted.internet import task
+from crawler.items import ProfileSeenItem, ProfileRejectedItem
+from crawler.utils.profile_schema import migrate_profiles, parse_year, RESEARCH_COLUMNS
 
 
 class DatabaseIOPipeline(object):
 
     crawler_name = 'core'
 
-    def __init__(self):
-        parent_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        database_path = os.path.join(parent_path, 'database.db')
-        self.connection = sqlite3.connect(database_path)
+    # Buffer items and write them in batches, committing when either threshold is reached
+    BATCH_SIZE = 100
+    FLUSH_INTERVAL = 30
+
+    # Insert new profiles and update existing ones unless they have been edited by users
+    # Years are written both as text and as integers, NULL when unknown
+    # The rank saved by the benchmarker is cleared when the PhD school changes, and so is the embedded research area
+    # when the text changes
+    UPSERT_QUERY = ('INSERT INTO profiles (profile_link, name, department, university, tag, position, phd_year, '
+                    'phd_school, promotion_year, text_raw, phd_year_int, promotion_year_int, user_updated) '
+                    'values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0) '
+                    'ON CONFLICT(profile_link) DO UPDATE SET name = excluded.name, '
+                    'department = excluded.department, university = excluded.university, tag = excluded.tag, '
+                    'position = excluded.position, phd_year = excluded.phd_year, phd_school = excluded.phd_school, '
+                    'promotion_year = excluded.promotion_year, text_raw = excluded.text_raw, '
+                    'phd_year_int = excluded.phd_year_int, promotion_year_int = excluded.promotion_year_int, '
+                    'phd_school_rank = CASE WHEN profiles.phd_school IS excluded.phd_school '
+                    'THEN profiles.phd_school_rank END, ' +
+                    ', '.join('%s = CASE WHEN profiles.text_raw IS excluded.text_raw THEN profiles.%s END' %
+                              (column, column) for column in RESEARCH_COLUMNS) + ' '
+                    'WHERE profiles.user_updated = 0')
+
+    # Record the hash of the main text and the time every profile is seen, including those edited by users
+    TOUCH_QUERY = 'UPDATE profiles SET content_hash = ?, last_seen = ? WHERE profile_link = ?'
+
+    # Record the hash of the pages rejected as not being of a professor
+    REJECT_QUERY = ('INSERT INTO rejected_pages (profile_link, content_hash, last_seen) values (?, ?, ?) '
+                    'ON CONFLICT(profile_link) DO UPDATE SET content_hash = excluded.content_hash, '
+                    'last_seen = excluded.last_seen')
+
+    DATABASE_PATH = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')), 'database.db')
+
+    def __init__(self, batch_size=None, flush_interval=None):
+        self.batch_size = batch_size if batch_size is not None else DatabaseIOPipeline.BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else DatabaseIOPipeline.FLUSH_INTERVAL
+        self.buffer = []
+        self.touch_buffer = []
+        self.reject_buffer = []
+        self.last_flush = time.time()
+        self.flush_loop = task.LoopingCall(self.flush_if_needed)
+
+        self.connection = sqlite3.connect(DatabaseIOPipeline.DATABASE_PATH)
         self.cursor = self.connection.cursor()
 
+        # Let the web application keep reading while the crawler writes and avoid a sync on every commit
+        self.cursor.execute('PRAGMA journal_mode = WAL')
+        self.cursor.execute('PRAGMA synchronous = NORMAL')
+
         self.cursor.execute('CREATE TABLE IF NOT EXISTS process'
                             '(crawler_name TEXT PRIMARY KEY, '
                             'processing INT NOT NULL )')
@@ -41,30 +88,90 @@ class DatabaseIOPipeline(object):
                             'phd_school TEXT,'
                             'promotion_year TEXT,'
                             'text_raw TEXT,'
-                            'user_updated INTEGER)')
+                            'user_updated INTEGER,'
+                            'content_hash TEXT,'
+                            'last_seen TEXT,'
+                            'phd_year_int INTEGER,'
+                            'promotion_year_int INTEGER,'
+                            'phd_school_rank INTEGER,'
+                            'research_sentences TEXT,'
+                            'research_keywords TEXT,'
+                            'research_vector BLOB,'
+                            'keyword_vectors BLOB,'
+                            'revision INTEGER)')
+        self.cursor.execute('CREATE TABLE IF NOT EXISTS rejected_pages '
+                            '(profile_link TEXT PRIMARY KEY, '
+                            'content_hash TEXT NOT NULL, '
+                            'last_seen TEXT)')
+        self.connection.commit()
+
+        # Add the columns and indexes to databases created before, and log every profile written under a new
+        # revision for the caches of derived data to refresh
+        migrate_profiles(self.connection)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(batch_size=crawler.settings.getint('DATABASE_BATCH_SIZE', cls.BATCH_SIZE),
+                   flush_interval=crawler.settings.getfloat('DATABASE_FLUSH_INTERVAL', cls.FLUSH_INTERVAL))
+
+    @staticmethod
+    def load_content_hash(table='profiles'):
+        # Get the hash of every stored profile by its link, or of every rejected page with table='rejected_pages'
+        connection = sqlite3.connect(DatabaseIOPipeline.DATABASE_PATH)
+        try:
+            return dict(connection.execute('SELECT profile_link, content_hash FROM %s '
+                                           'WHERE content_hash IS NOT NULL' % table).fetchall())
+        except sqlite3.OperationalError:
+            # The table or the column does not exist before the first crawl
+            return {}
+        finally:
+            connection.close()
+
+    def open_spider(self, spider):
+        # Also check the time-based flush while no item arrives, so that buffered items do not wait for the next one
+        if self.flush_interval > 0:
+            self.flush_loop.start(self.flush_interval, now=False)
 
     def process_item(self, item, spider):
-        self.cursor.execute("SELECT * FROM profiles WHERE profile_link=?", (item['profile_link'], ))
-        result = self.cursor.fetchone()
-        if not result:
-            self.cursor.execute(
-                "INSERT INTO profiles (profile_link, name, department, university, tag, position, phd_year, phd_school, "
-                "promotion_year, text_raw, user_updated) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                (item['profile_link'], item['name'], item['department'], item['university'], item['tag'],
-                 item['position'], item['phd_year'], item['phd_school'], item['promotion_year'],
-                 ' '.join(item['text_raw']), 0))
-            self.connection.commit()
-        else:
-            self.cursor.execute(
-                "UPDATE profiles SET name = ?, department = ?, university = ?, tag = ?, position = ?, phd_year = ?, phd_school = ?, "
-                "promotion_year = ?, text_raw = ? WHERE profile_link = ? and user_updated = 0",
-                (item['name'], item['department'], item['university'], item['tag'],
-                 item['position'], item['phd_year'], item['phd_school'], item['promotion_year'],
-                 ' '.join(item['text_raw']), item['profile_link']))
-            self.connection.commit()
+        last_seen = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(item, ProfileRejectedItem):
+            self.reject_buffer.append((item['profile_link'], item['content_hash'], last_seen))
+            self.flush_if_needed()
+            return item
+
+        self.touch_buffer.append((item['content_hash'], last_seen, item['profile_link']))
+        if isinstance(item, ProfileSeenItem):
+            # Only mark the unchanged profile as seen
+            self.flush_if_needed()
+            return item
+
+        self.buffer.append((item['profile_link'], item['name'], item['department'], item['university'], item['tag'],
+                            item['position'], item['phd_year'], item['phd_school'], item['promotion_year'],
+                            ' '.join(item['text_raw']), parse_year(item['phd_year']),
+                            parse_year(item['promotion_year'])))
+        self.flush_if_needed()
         return item
 
+    def flush_if_needed(self):
+        if (len(self.touch_buffer) + len(self.reject_buffer) >= self.batch_size) or (time.time() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        # Write the buffered items in one transaction
+        if len(self.touch_buffer) + len(self.reject_buffer) > 0:
+            self.cursor.executemany(DatabaseIOPipeline.UPSERT_QUERY, self.buffer)
+            self.cursor.executemany(DatabaseIOPipeline.TOUCH_QUERY, self.touch_buffer)
+            self.cursor.executemany(DatabaseIOPipeline.REJECT_QUERY, self.reject_buffer)
+            self.connection.commit()
+            self.buffer = []
+            self.touch_buffer = []
+            self.reject_buffer = []
+        self.last_flush = time.time()
+
     def close_spider(self, spider):
+        if self.flush_loop.running:
+            self.flush_loop.stop()
+        self.flush()
         self.cursor.execute('UPDATE process SET processing = ? WHERE crawler_name = ?',
                             (0, DatabaseIOPipeline.crawler_name))
         self.connection.commit()
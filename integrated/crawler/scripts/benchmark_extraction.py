@@ -0,0 +1,47 @@
+import sys
+import time
+from crawler.scripts.page_corpus import load_pages
+from crawler.utils.xpath_generic_extractor import get_menu, get_general, get_main_content_unique, \
+    generic_get_unique_content, get_title_h1_h2_h3, get_content_hash, get_page_title, ExtractionContext, \
+    ResponseFingerprint
+
+
+# Micro-benchmark of the per-page extraction done by the core spider callbacks
+# Compare passing the response to every extraction function, which evaluates each XPath expression again
+# on every call, with passing one extraction context per page
+
+def extract_page(page):
+    # Extraction of a page through parse_menu, parse_people and the profile item processing
+    get_menu(page)
+    ResponseFingerprint(page)
+    get_page_title(page)
+    get_main_content_unique(page, [])
+    generic_get_unique_content(page, [], get_text=True)
+    get_title_h1_h2_h3(page)
+    get_content_hash(page)
+    get_general(page)
+
+
+def run_benchmark(path, repeat=5, limit=None):
+    pages = load_pages(path, limit=limit)
+    if len(pages) == 0:
+        print('No HTML page found in %s' % path)
+        return
+
+    timing = {}
+    for mode in ['response', 'context']:
+        start = time.time()
+        for _ in range(repeat):
+            for page in pages:
+                # Copy the page so that every run parses the document again
+                page = page.replace()
+                extract_page(ExtractionContext(page) if mode == 'context' else page)
+        timing[mode] = (time.time() - start) * 1000 / (repeat * len(pages))
+        print('%s: %.2f ms per page' % (mode, timing[mode]))
+    print('Speedup: %.2fx over %d pages' % (timing['response'] / timing['context'], len(pages)))
+
+
+# Example (from the integrated directory, with a directory of HTML files or the HTTP cache directory):
+# python -m crawler.scripts.benchmark_extraction .scrapy/httpcache/core
+if __name__ == '__main__':
+    run_benchmark(sys.argv[1])
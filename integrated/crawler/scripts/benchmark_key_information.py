@@ -0,0 +1,65 @@
+import re
+import sys
+import time
+from lxml import html
+from crawler.scripts.page_corpus import load_pages
+from crawler.utils.profile_info_analyzer import get_key_information, get_text_group, GROUP_TEXT_XPATH, \
+    DIV_TEXT_XPATH
+from crawler.utils.xpath_generic_extractor import ExtractionContext
+
+
+# Micro-benchmark of the key information extraction over stored profile pages
+# Compare the text groups walked from the parsed document with the text groups got by serializing every group
+# element, splitting it by tags and parsing every div element again, and check that both are the same
+
+TAG_REGEX = re.compile(r'\<[^>]*\>')
+
+
+def get_serialized_text_group(response):
+    # Text groups as extracted from the serialized HTML of the response
+    text_group_list = [TAG_REGEX.split(html_str) for html_str in response.xpath(GROUP_TEXT_XPATH).extract()]
+    text_group_list += [html.fromstring(html_str).xpath('text()') for html_str in response.xpath(DIV_TEXT_XPATH).extract()]
+    text_group_list = [[' '.join(text.split()) for text in text_group if len(text.split()) > 0]
+                       for text_group in text_group_list]
+    return [text_group for text_group in text_group_list if len(text_group) > 0]
+
+
+def time_page(page, extract_func, repeat):
+    # Time the extraction alone, with a document parsed again on every run
+    total = 0
+    for _ in range(repeat):
+        page = page.replace()
+        page.selector
+        start = time.time()
+        extract_func(page)
+        total += time.time() - start
+    return total
+
+
+def run_benchmark(path, repeat=5, limit=None):
+    pages = load_pages(path, limit=limit)
+    if len(pages) == 0:
+        print('No HTML page found in %s' % path)
+        return
+
+    mismatch = [page.url for page in pages
+                if get_serialized_text_group(page) != list(get_text_group(ExtractionContext(page)))]
+    for url in mismatch:
+        print('Text groups differ: %s' % url)
+
+    timing = {
+        'serialized': sum(time_page(page, get_serialized_text_group, repeat) for page in pages),
+        'tree walk': sum(time_page(page, lambda x: list(get_text_group(ExtractionContext(x))), repeat)
+                         for page in pages),
+        'key information': sum(time_page(page, get_key_information, repeat) for page in pages)
+    }
+    for mode in ['serialized', 'tree walk', 'key information']:
+        print('%s: %.2f ms per page' % (mode, timing[mode] * 1000 / (repeat * len(pages))))
+    print('Text group speedup: %.2fx over %d pages, %d mismatched' %
+          (timing['serialized'] / timing['tree walk'], len(pages), len(mismatch)))
+
+
+# Example (from the integrated directory, with a directory of HTML files or the HTTP cache directory):
+# python -m crawler.scripts.benchmark_key_information .scrapy/httpcache/core
+if __name__ == '__main__':
+    run_benchmark(sys.argv[1])
@@ -0,0 +1,51 @@
+import gzip
+import os
+import pickle
+from scrapy.http import Headers, HtmlResponse, Request
+from scrapy.responsetypes import responsetypes
+from w3lib.http import headers_raw_to_dict
+
+
+# Load stored pages as responses for benchmarking and regression checking
+# Pages are read either from a directory of .html files or from the HTTP cache of a crawl (HTTPCACHE_DIR),
+# in which case only HTML responses are kept
+
+def load_pages(path, limit=None):
+    pages = []
+    for root, directories, files in os.walk(path):
+        directories.sort()
+        if 'pickled_meta' in files:
+            # Each response stored by the cache has a directory of its own
+            response = read_cached_response(root)
+            pages += [response] if response is not None else []
+        else:
+            pages += [read_html_file(os.path.join(root, file_name)) for file_name in sorted(files)
+                      if file_name.endswith('.html') or file_name.endswith('.htm')]
+        if limit is not None and len(pages) >= limit:
+            break
+    return pages[:limit] if limit is not None else pages
+
+
+def read_html_file(file_path):
+    # Name the page after the file, which is used to resolve relative links
+    url = 'http://localhost/%s' % os.path.basename(file_path)
+    with open(file_path, 'rb') as html_file:
+        return HtmlResponse(url, body=html_file.read(), request=Request(url))
+
+
+def read_cached_response(entry_path):
+    # Read a response stored by the filesystem cache storage, compressed or not
+    meta = pickle.loads(read_cache_file(os.path.join(entry_path, 'pickled_meta')))
+    headers = Headers(headers_raw_to_dict(read_cache_file(os.path.join(entry_path, 'response_headers'))))
+    body = read_cache_file(os.path.join(entry_path, 'response_body'))
+    url = meta['response_url']
+    response_class = responsetypes.from_args(headers=headers, url=url, body=body)
+    if not issubclass(response_class, HtmlResponse):
+        return None
+    return response_class(url, status=meta['status'], headers=headers, body=body, request=Request(meta['url']))
+
+
+def read_cache_file(file_path):
+    with open(file_path, 'rb') as cache_file:
+        content = cache_file.read()
+    return gzip.decompress(content) if content[:2] == b'\x1f\x8b' else content
@@ -0,0 +1,67 @@
+import json
+import sys
+import time
+from crawler.scripts.page_corpus import load_pages
+from crawler.spiders.core import UniversityWebCrawlerRefined
+from crawler.utils.profile_info_analyzer import get_key_information
+from crawler.utils.profile_rule_engine import ProfileRuleEngine
+from crawler.utils.xpath_generic_extractor import generic_get_unique_content, get_page_title, ExtractionContext
+
+
+# Regression check of the position and year information extracted from stored profile pages
+# Record the fields of every page once, then check the fields extracted later against the record along with the
+# time taken per profile
+
+def extract_profile_fields(page, len_lim=10):
+    # Fields of a profile page as extracted by the core spider, with the year information of the main text
+    # parsed the same way as a resume
+    context = ExtractionContext(page)
+    title = get_page_title(context) or ''
+    rule_engine = ProfileRuleEngine(generic_get_unique_content(context, [], get_text=True))
+    return {
+        'position': UniversityWebCrawlerRefined.find_profile_position(title, rule_engine, len_lim),
+        'key_information': [str(value) for value in get_key_information(context)[:3]],
+        'text_year_info': [str(value) for value in UniversityWebCrawlerRefined.parse_year_info(rule_engine, len_lim)]
+    }
+
+
+def record_corpus(path, record_path, limit=None):
+    pages = load_pages(path, limit=limit)
+    record = {page.url: extract_profile_fields(page) for page in pages}
+    with open(record_path, 'w') as record_file:
+        json.dump(record, record_file, indent=2, sort_keys=True)
+    print('Recorded %d profile pages to %s' % (len(record), record_path))
+
+
+def check_corpus(path, record_path, repeat=3, limit=None):
+    with open(record_path) as record_file:
+        record = json.load(record_file)
+    pages = [page for page in load_pages(path, limit=limit) if page.url in record]
+    if len(pages) == 0:
+        print('No recorded profile page found in %s' % path)
+        return
+
+    mismatch = 0
+    for page in pages:
+        fields = extract_profile_fields(page)
+        if fields != record[page.url]:
+            mismatch += 1
+            print('Fields differ: %s\n  recorded: %s\n  found: %s' % (page.url, record[page.url], fields))
+
+    start = time.time()
+    for _ in range(repeat):
+        for page in pages:
+            # Copy the page so that every run parses the document again
+            extract_profile_fields(page.replace())
+    print('%.2f ms per profile over %d pages, %d mismatched' %
+          ((time.time() - start) * 1000 / (repeat * len(pages)), len(pages), mismatch))
+
+
+# Example (from the integrated directory, with a directory of HTML files or the HTTP cache directory):
+# python -m crawler.scripts.profile_regression record .scrapy/httpcache/core profile_record.json
+# python -m crawler.scripts.profile_regression check .scrapy/httpcache/core profile_record.json
+if __name__ == '__main__':
+    if sys.argv[1] == 'record':
+        record_corpus(sys.argv[2], sys.argv[3])
+    else:
+        check_corpus(sys.argv[2], sys.argv[3])
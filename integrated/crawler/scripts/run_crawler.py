@@ -5,7 +5,8 @@ from scrapy.utils.url import is_url
 
 class ProfileCrawlerProcess(scrapy.crawler.CrawlerProcess):
 
-    USE_CASE = frozenset(['GENERIC_BROAD', 'GENERIC_PAR', 'PRIORITIZE_BROAD', 'PRIORITIZE_PAR', 'TEST'])
+    USE_CASE = frozenset(['GENERIC_BROAD', 'GENERIC_PAR', 'PRIORITIZE_BROAD', 'PRIORITIZE_PAR', 'PRIORITIZE_WARM',
+                          'TEST'])
     CRAWLER_NAME = 'core'
     PAGE_LIMIT = 50
 
@@ -31,12 +32,15 @@ class ProfileCrawlerProcess(scrapy.crawler.CrawlerProcess):
                 self.crawl(ProfileCrawlerProcess.CRAWLER_NAME, **{'TESTING': True})
             elif self.crawler_type == 'PRIORITIZE_BROAD':
                 self.crawl(ProfileCrawlerProcess.CRAWLER_NAME, **{'PRIORITIZED': True})
+            elif self.crawler_type == 'PRIORITIZE_WARM':
+                # Start from the staff directory pages found by previous crawls
+                self.crawl(ProfileCrawlerProcess.CRAWLER_NAME, **{'PRIORITIZED': True, 'WARM_START': True})
         self.start()
 
 
 def run_crawler(crawler_type, *args):
     process = ProfileCrawlerProcess(crawler_type)
-    if crawler_type in ['GENERIC_BROAD', 'PRIORITIZE_BROAD', 'TEST']:
+    if crawler_type in ['GENERIC_BROAD', 'PRIORITIZE_BROAD', 'PRIORITIZE_WARM', 'TEST']:
         process.start_crawl()
     elif crawler_type == 'PRIORITIZE_PAR':
         assert len(args) == 2
@@ -49,6 +53,7 @@ def run_crawler(crawler_type, *args):
 # if __name__ == '__main__':
 #    run_crawler('GENERIC_BROAD')
 #    run_crawler('PRIORITIZE_BROAD')
+#    run_crawler('PRIORITIZE_WARM')
 #    run_crawler('TEST')
 #    run_crawler('PRIORITIZE_PAR', ['Queen Mary University of London', 'University of British Columbia'], 'Geography')
 #    run_crawler('GENERIC_PAR', 'https://economics.stanford.edu/')
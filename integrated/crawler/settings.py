@@ -12,6 +12,30 @@
 # Some custom settings that will be imported by core.py
 PRINT_VERBOSE = False
 
+# Bound the per-site cache of menu entry classification (number of sites and entries per site)
+MENU_CACHE_SITE_LIMIT = 256
+MENU_CACHE_ENTRY_LIMIT = 2048
+
+# Bound the process-wide cache of named entity recognition
+ENTITY_CACHE_SIZE = 50000
+
+# Number of worker processes for named entity recognition, profile text analysis and resume text extraction
+# (0 to run in the crawler process), the number of tasks handed to them at once and the number of tasks waiting
+# for them
+EXTRACTION_WORKER_COUNT = 2
+EXTRACTION_QUEUE_SIZE = 16
+EXTRACTION_WAITING_LIMIT = 64
+
+# Write profile items to the database in batches, committing every given number of items or seconds
+DATABASE_BATCH_SIZE = 100
+DATABASE_FLUSH_INTERVAL = 30
+
+# Maximum number of department records kept in memory for profile page patterns
+PROFILE_PATTERN_MEMORY_LIMIT = 4096
+
+# Maximum number of staff directory pages requested directly for each department in warm start mode
+WARM_START_SEED_LIMIT = 5
+
 BOT_NAME = 'crawler'
 LOG_LEVEL = 'INFO'
 
@@ -67,7 +91,8 @@ DEFAULT_REQUEST_HEADERS = {
 SPIDER_MIDDLEWARES = {
     # 'scrapy_splash.SplashDeduplicateArgsMiddleware': 100,
     'scrapy.spidermiddlewares.offsite.OffsiteMiddleware': 100,
-    'scrapy.spidermiddlewares.depth.DepthMiddleware': 100
+    'scrapy.spidermiddlewares.depth.DepthMiddleware': None,
+    'crawler.middlewares.SameDepthMiddleware': 100
 }
 
 # Enable or disable downloader middlewares
@@ -78,6 +103,8 @@ DOWNLOADER_MIDDLEWARES = {
     # 'scrapy_splash.SplashCookiesMiddleware': 723,
     # 'scrapy_splash.SplashMiddleware': 725,
     'scrapy.downloadermiddlewares.httpcompression.HttpCompressionMiddleware': 810,
+    'scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware': None,
+    'crawler.httpcache.HttpCacheStatsMiddleware': 900,
 }
 
 USER_AGENT = 'Mozilla/5.0 (Windows; U; Windows NT 5.1; en-US; rv:1.8.1.14) Gecko/20080404 Firefox/2.0.0.14'
@@ -109,8 +136,13 @@ ITEM_PIPELINES = {
 
 # Enable and configure HTTP caching (disabled by default)
 # See http://scrapy.readthedocs.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-# HTTPCACHE_ENABLED = True
-# HTTPCACHE_EXPIRATION_SECS = 0
-# HTTPCACHE_DIR = 'httpcache'
-# HTTPCACHE_IGNORE_HTTP_CODES = []
-# HTTPCACHE_STORAGE = 'scrapy.extensions.httpcache.FilesystemCacheStorage'
+# Pages are revalidated with ETag/Last-Modified on repeat crawls and 304 responses are served from the cache
+HTTPCACHE_ENABLED = True
+HTTPCACHE_EXPIRATION_SECS = 0
+HTTPCACHE_DIR = 'httpcache'
+HTTPCACHE_IGNORE_HTTP_CODES = [500, 502, 503, 504]
+HTTPCACHE_POLICY = 'scrapy.extensions.httpcache.RFC2616Policy'
+HTTPCACHE_STORAGE = 'crawler.httpcache.BoundedFilesystemCacheStorage'
+HTTPCACHE_GZIP = True
+# Maximum size of the cache in bytes with least recently used eviction, 0 for no limit
+HTTPCACHE_SIZE_LIMIT = 2 * 1024 ** 3
@@ -1,23 +1,32 @@
-import io
+import hashlib
 import os
 import pandas
 import re
-import requests
 import scrapy
-from crawler.items import ProfilePageItem
-from crawler.utils.profile_info_analyzer import get_key_information
+from crawler.items import ProfilePageItem, ProfileSeenItem, ProfileRejectedItem
+from crawler.pipelines import DatabaseIOPipeline
+from crawler.utils.college_matcher import CollegeNameIndex
+from crawler.utils.directory_seed_store import DirectorySeedStore
+from crawler.utils.entity_recognizer import EntityRecognizer
+from crawler.utils.extraction_executor import ExtractionExecutor
+from crawler.utils.menu_cache import MenuClassificationCache
+from crawler.utils.profile_pattern_store import ProfilePatternStore
+from crawler.utils.profile_info_analyzer import get_group_information, get_text_group, get_resume_text
+from crawler.utils.profile_rule_engine import ProfileRuleEngine
 from crawler.utils.similarity_navigator import SimilarityNavigator
-from crawler.utils.xpath_generic_extractor import get_title_h1_h2_h3, get_main_content_unique, generic_get_unique_content
+from crawler.utils.xpath_generic_extractor import get_title_h1_h2_h3, get_main_content_unique, generic_get_unique_content,\
+    get_content_hash, get_page_title, ExtractionContext, ResponseFingerprint
 from datetime import datetime
 from difflib import SequenceMatcher
 from lxml import html
-from PyPDF2 import PdfFileReader
 from random import shuffle
-from scrapy import Request
+from scrapy import Request, signals
+from scrapy.exceptions import DontCloseSpider
 from scrapy.linkextractors import LinkExtractor, IGNORED_EXTENSIONS
 from scrapy.utils.project import get_project_settings
 from scrapy.utils.url import parse_url, url_has_any_extension, is_url
 from tld import get_tld
+from twisted.internet import defer
 
 
 class UniversityWebCrawlerRefined(scrapy.Spider):
@@ -57,6 +66,11 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
     department_data_index = department_data.index
     department_data_prioritized = pandas.read_csv(data_file_path + DEPARTMENT_DATA_PRIORITIZED)
 
+    # Index college names once for fuzzy matching of PhD school, case-insensitive for filtering and
+    # case-sensitive for normalization
+    COLLEGE_INDEX_IGNORE_CASE = CollegeNameIndex(college_list, ignore_case=True)
+    COLLEGE_INDEX = CollegeNameIndex(college_list)
+
     # Import and initiate similarity navigator
     SIMILARITY_NAVIGATOR = SimilarityNavigator()
 
@@ -69,10 +83,12 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                                        'college', 'staff', 'student', 'lab', 'footer', 'impact', 'header',
                                        'department', 'view', 'profile', 'human', 'resources', 'hub', 'scholar'])
 
-    # Create a class attribute to store corresponding patterns that match a profile page under certain
-    # department site
+    # Initiate batched named entity recognition with a process-wide cache
+    ENTITY_RECOGNIZER = EntityRecognizer(SIMILARITY_NAVIGATOR.model_en, ENTITY_FILTER_KEYWORD,
+                                         cache_size=SETTINGS.getint('ENTITY_CACHE_SIZE'))
+
     # Only crawling links that match certain patterns after reaching the threshold
-    POSSIBLE_PROFILE_PAGE = {}
+    # Patterns that match a profile page under certain department site are stored by the profile pattern store
     PROFILE_THRESHOLD = 10
 
     # Params for testing
@@ -85,6 +101,7 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
         self.testing = kwargs.get('TESTING', False)
         self.generic = kwargs.get('GENERIC', False)
         self.prioritize = bool(kwargs.get('PRIORITIZED', False))
+        self.warm = bool(kwargs.get('WARM_START', False))
 
         # Initiate spider object and shuffling urls to start crawling
         if self.generic:
@@ -128,6 +145,30 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
         self.denied_extension = list(map(lambda x: '.%s' % x, IGNORED_EXTENSIONS))
         self.profile_threshold = UniversityWebCrawlerRefined.PROFILE_THRESHOLD
 
+        # Initiate the per-site cache of menu classification as the same menu repeats on every page of a site
+        settings = UniversityWebCrawlerRefined.SETTINGS
+        self.menu_cache = MenuClassificationCache(site_limit=settings.getint('MENU_CACHE_SITE_LIMIT'),
+                                                  entry_limit=settings.getint('MENU_CACHE_ENTRY_LIMIT'))
+
+        # Initiate the extraction executor before any thread is started as it forks the worker processes
+        self.extraction_executor = ExtractionExecutor(worker_count=settings.getint('EXTRACTION_WORKER_COUNT'),
+                                                      queue_size=settings.getint('EXTRACTION_QUEUE_SIZE'),
+                                                      waiting_limit=settings.getint('EXTRACTION_WAITING_LIMIT'))
+
+        # Initiate the store of profile page patterns, saved across crawls and bounded in memory
+        self.possible_profile_page = ProfilePatternStore(DatabaseIOPipeline.DATABASE_PATH, self.profile_threshold,
+                                                         memory_limit=settings.getint('PROFILE_PATTERN_MEMORY_LIMIT'))
+
+        # Initiate the store of staff directory pages that produced profile items, used as seeds for warm start
+        # Keep the discovery request of every seeded start to fall back on
+        self.directory_seeds = DirectorySeedStore(DatabaseIOPipeline.DATABASE_PATH,
+                                                  seed_limit=settings.getint('WARM_START_SEED_LIMIT'))
+        self.seed_fall_back = {}
+
+        # Get the hash of the stored profiles and of the pages rejected before to skip extraction of unchanged pages
+        self.profile_hash = DatabaseIOPipeline.load_content_hash()
+        self.rejected_hash = DatabaseIOPipeline.load_content_hash('rejected_pages')
+
     def start_requests(self):
         # Use normal request by default for department homepage for faster loading speed
         # Use splash request by default otherwise for possible AJAX-inclusive pages with rendering
@@ -140,9 +181,11 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
             request.meta['Title'] = UniversityWebCrawlerRefined.test_title
             request.meta['University Name'] = 'Test School'
             request.meta['Original Start'] = (test_link, UniversityWebCrawlerRefined.test_title)
+            request.meta['Seed Start'] = request.meta['Original Start']
             request.meta['Previous Link'] = ''
             request.meta['Is Department'] = UniversityWebCrawlerRefined.test_tag
-            yield request
+            for start_request in self.warm_start(request):
+                yield start_request
 
         elif self.prioritize & (None in self.start_domain):
             for index, value in UniversityWebCrawlerRefined.department_data_prioritized.iterrows():
@@ -164,10 +207,12 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                 # Some basic record-based data
                 request.meta['University Name'] = university_name
                 request.meta['Original Start'] = (url_link, link_title)
+                request.meta['Seed Start'] = request.meta['Original Start']
                 request.meta['Previous Link'] = ''
                 request.meta['Is Department'] = department_or_faculty
                 request.meta['tag'] = tag
-                yield request
+                for start_request in self.warm_start(request):
+                    yield start_request
 
         elif self.start_domain[0] is not None and self.start_domain[1] is not None:
             assert type(self.start_domain[0]) is list
@@ -196,10 +241,12 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                 # Some basic record-based data
                 request.meta['University Name'] = value['school_name']
                 request.meta['Original Start'] = (url_link, link_title)
+                request.meta['Seed Start'] = request.meta['Original Start']
                 request.meta['Previous Link'] = ''
                 request.meta['Is Department'] = department_or_faculty
                 request.meta['tag'] = tag
-                yield request
+                for start_request in self.warm_start(request):
+                    yield start_request
 
         elif self.generic & (self.particular_url is None):
             for individual_index in self.shuffled_index:
@@ -221,9 +268,11 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                 # Some basic record-based data
                 request.meta['University Name'] = university_name
                 request.meta['Original Start'] = (url_link, link_title)
+                request.meta['Seed Start'] = request.meta['Original Start']
                 request.meta['Previous Link'] = ''
                 request.meta['Is Department'] = department_or_faculty
-                yield request
+                for start_request in self.warm_start(request):
+                    yield start_request
 
         elif self.particular_url is not None:
             if is_url(self.particular_url):
@@ -240,10 +289,77 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                 request.meta['Title'] = 'Department'
                 request.meta['University Name'] = school_name
                 request.meta['Original Start'] = (self.particular_url, 'Department')
+                request.meta['Seed Start'] = request.meta['Original Start']
                 request.meta['Previous Link'] = ''
                 request.meta['Is Department'] = 'department'
                 request.meta['From parse_department'] = True
-                yield request
+                for start_request in self.warm_start(request):
+                    yield start_request
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        # Connect to the idle signal to fall back to discovery for warm start seeds that produced nothing
+        spider = super(UniversityWebCrawlerRefined, cls).from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider.spider_idle, signal=signals.spider_idle)
+        return spider
+
+    def warm_start(self, request):
+        # Request the staff directory pages recorded for the start directly at parse_people in warm start mode
+        # Use the discovery request otherwise, or when no directory page has been recorded
+        seeds = self.directory_seeds.get_seeds(request.meta['Seed Start']) if self.warm else []
+        if len(seeds) == 0:
+            return [request]
+
+        self.seed_fall_back[request.meta['Seed Start']] = request
+        seed_requests = []
+        for seed in seeds:
+            seed_meta = {
+                # Link-related data
+                'Link': seed['Directory'],
+                'Title': seed['Original Start'][1],
+                'depth': 1,
+                'Past Fingerprint': [],
+
+                # Some basic record-based data
+                'University Name': seed['University Name'],
+                'Original Start': seed['Original Start'],
+                'Seed Start': request.meta['Seed Start'],
+                'Previous Link': '',
+                'Is Department': seed['Is Department'],
+                'tag': seed['tag'],
+                'Warm Start': True
+            }
+            seed_requests.append(Request(seed['Directory'], callback=self.parse_people, meta=seed_meta,
+                                         errback=self.errback_seed))
+        return seed_requests
+
+    def fall_back_from_seed(self, seed_start):
+        # Get the discovery request of the seed start, only once for all its seeds
+        request = self.seed_fall_back.pop(seed_start, None)
+        if request is not None:
+            self.logger.info('Falling back to discovery for %s' % (seed_start, ))
+            self.crawler.stats.inc_value('warm_start/fall_back', spider=self)
+            request.dont_filter = True
+        return request
+
+    def errback_seed(self, failure):
+        # Fall back to discovery when a warm start seed cannot be downloaded
+        self.errback_report(failure)
+        request = self.fall_back_from_seed(failure.request.meta['Seed Start'])
+        if request is not None:
+            self.crawler.engine.crawl(request, self)
+
+    def spider_idle(self, spider):
+        # Fall back to discovery for the seed starts whose seeds have not produced any profile item
+        fall_back_request = [self.fall_back_from_seed(seed_start) for seed_start in list(self.seed_fall_back.keys())
+                             if self.directory_seeds.count_found(seed_start) == 0]
+
+        # The seeds of the remaining starts have produced profile items
+        self.seed_fall_back = {}
+        for request in fall_back_request:
+            self.crawler.engine.crawl(request, self)
+        if len(fall_back_request) > 0:
+            raise DontCloseSpider
 
     def parse_menu(self, response):
         # Parse menu content of the current page to locate department or people components
@@ -251,17 +367,25 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
         if self.report_basic_information(response, response.meta)['404']:
             return
 
+        # Parse the response once for all extraction in the callback
+        context = ExtractionContext(response)
+
         # Start core content analysis including menu and navigation content parsing
-        current_response = response
         if (not response.meta.get('From parse_department', False)) & (not response.meta.get('Fall Back', False)) &\
            (not response.meta['Is Department'] == 'department'):
             # Get general target content if the response does not have the above meta data
-            target_content = UniversityWebCrawlerRefined.SIMILARITY_NAVIGATOR.get_target_content(response)
+            target_content = UniversityWebCrawlerRefined.SIMILARITY_NAVIGATOR.get_target_content(context,
+                                                                                                 cache=self.menu_cache)
         else:
             # Parse only faculty-related content otherwise with a higher threshold
-            target_content = UniversityWebCrawlerRefined.SIMILARITY_NAVIGATOR.get_target_content(response,
+            target_content = UniversityWebCrawlerRefined.SIMILARITY_NAVIGATOR.get_target_content(context,
                                                                                                  parse_only_people=True,
-                                                                                                 threshold=0.85)
+                                                                                                 threshold=0.85,
+                                                                                                 cache=self.menu_cache)
+        self.report_cache_stats()
+
+        # Keep only a compact fingerprint of the current response for the next level of parsing
+        current_fingerprint = ResponseFingerprint(context)
 
         if UniversityWebCrawlerRefined.IS_PRINT_VERBOSE:
             # Print current callback-level information
@@ -284,11 +408,12 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                 'Link': target_link,
                 'Title': target_title,
                 'depth': response.meta['depth'] + 1,
-                'Past Response': [current_response],
+                'Past Fingerprint': [current_fingerprint],
 
                 # Some basic record-based data
                 'University Name': response.meta['University Name'],
                 'Original Start': response.meta['Original Start'],
+                'Seed Start': response.meta.get('Seed Start'),
                 'Previous Link': response.url,
                 'Fall Back': response.meta.get('Fall Back', False),
                 'Is Department': response.meta['Is Department'],
@@ -299,16 +424,15 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
             if target_tag == 'PEOPLE':
                 # If the response is originated from parse_department, change the title
                 if response.meta.get('From parse_department', False):
-                    title = response.xpath('//title/text()').extract_first()
+                    title = get_page_title(context)
                 else:
                     title = None
 
                 target_meta['Original Start'] = (response.url, title if title is not None else response.meta['Title'])
-                if target_meta['Original Start'] not in UniversityWebCrawlerRefined.POSSIBLE_PROFILE_PAGE.keys():
-                    # Start recording the profile page dictionary by setting original start (key pair) as key
-                    UniversityWebCrawlerRefined.POSSIBLE_PROFILE_PAGE[target_meta['Original Start']] = {}
-                    UniversityWebCrawlerRefined.POSSIBLE_PROFILE_PAGE[target_meta['Original Start']]['Total'] = 0
-                    UniversityWebCrawlerRefined.POSSIBLE_PROFILE_PAGE[target_meta['Original Start']]['Pattern'] = []
+
+                # Start recording the profile page dictionary by setting original start (key pair) as key
+                # A pattern compiled by a previous crawl is loaded along with it
+                self.possible_profile_page.get(target_meta['Original Start'])
 
                 target_request = Request(target_link,
                                          callback=self.parse_people, meta=target_meta, errback=self.errback_report)
@@ -360,7 +484,7 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                              (response.url, response.meta['depth'], response.meta['Previous Link']))
 
         # Start core content analysis including main content parsing
-        current_response = response
+        context = ExtractionContext(response)
         current_depth = response.meta.copy()['depth']
         current_response_parsed_dict = {
             name: element
@@ -369,9 +493,10 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
         }
 
         # Get current unique content (fallback to get_general when nothing returned)
-        main_content = get_main_content_unique(response, response.meta['Past Response'])
+        main_content = get_main_content_unique(context, response.meta['Past Fingerprint'])
         main_content_parsed = [[text, link] + list(self.get_netloc_and_path_level(link))
                                for text, link in main_content.items()]
+        current_fingerprint = ResponseFingerprint(context)
 
         # Compare page-level data including domain name and path level
         for content_item in main_content_parsed:
@@ -395,6 +520,7 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                 # Some basic record-based data
                 'University Name': response.meta['University Name'],
                 'Original Start': response.meta['Original Start'],
+                'Seed Start': response.meta.get('Seed Start'),
                 'Previous Link': response.url,
                 'Is Department': response.meta['Is Department'],
             }
@@ -413,7 +539,7 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                 yield target_request
             else:
                 # Recursively yield request at parse_department level otherwise until reaching certain depth
-                content_meta['Past Response'] = response.meta['Past Response'] + [current_response]
+                content_meta['Past Fingerprint'] = response.meta['Past Fingerprint'] + [current_fingerprint]
                 response.meta['depth'] = current_depth
                 content_meta['depth'] = response.meta['depth']
                 target_request = Request(content_link, self.parse_department, meta=content_meta,
@@ -421,10 +547,20 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                 yield target_request
 
     def parse_people(self, response):
+        # Wait for the profile extraction offloaded to the extraction executor before handing the output to scrapy
+        output = self.resolve_deferred_output(self.parse_people_page(response))
+        self.report_cache_stats()
+        return output
+
+    def parse_people_page(self, response):
         # Parse main content of the current page recursively
         basics = self.report_basic_information(response, response.meta)
         if basics['404']:
-            # Stop parsing when encountering 404 error
+            # Stop parsing when encountering 404 error, falling back to discovery for a warm start seed
+            if response.meta.get('Warm Start', False):
+                request = self.fall_back_from_seed(response.meta['Seed Start'])
+                if request is not None:
+                    yield request
             return
 
         # If redirection contains keyword to filter, stop parsing
@@ -434,27 +570,27 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
 
         # If current page is an iframe (e.g. NUS Department of Japanese Studies)
         for iframe_link in self.iframe_extractor.extract_links(response):
-            # Get iframe link and reset depth, with callback at the same level (parse_people)
-            response.meta['depth'] -= 1
+            # Get iframe link at the depth of the current page, with callback at the same level (parse_people)
             new_meta = response.meta.copy()
             new_meta['iframe'] = True
-            new_meta['depth'] = response.meta['depth']
+            new_meta['Same Depth'] = True
             yield Request(response.urljoin(iframe_link.url), self.parse_people, meta=new_meta,
                           errback=self.errback_report)
 
         # Core part of parse_people with call on processing named entity for the response
-        current_response = response
+        # Parse the response once for all extraction in the callback and the profile item processing
+        context = ExtractionContext(response)
         current_depth = response.meta.copy()['depth']
 
-        # Get the dictionary assumed to have been created at parse_menu level
-        profile_dict = UniversityWebCrawlerRefined.POSSIBLE_PROFILE_PAGE[response.meta['Original Start']]
-        is_personal = self.process_possible_named_entity(response)
+        # Get the dictionary created at parse_menu level, or restored if it has been evicted since
+        profile_dict = self.possible_profile_page.get(response.meta['Original Start'])
+        is_personal = self.process_possible_named_entity(context)
 
         if current_depth > 1:
             # Only process when reaching depth deeper than 1
             # Compare the title with the previous, extract using xpath
-            current = response.xpath('//title/text()').extract_first()
-            previous = response.meta['Past Response'][-1].xpath('//title/text()').extract_first()
+            current = get_page_title(context)
+            previous = response.meta['Past Fingerprint'][-1].title
 
             # Get unique title for current page subsequently and handle None object
             current = '' if current is None else current
@@ -467,47 +603,23 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
             # If the original link title has person name
             # If the current page contains certain person element (publication, research interest and biography)
             # If the current unique title has person name
-            if (len(self.parse_entity(response.meta['Title'], including_org=False)) >= 1) | is_personal |\
-               (len(self.parse_entity(current_unique, including_org=False)) >= 1):
-                # Proceed with updating profile dictionary
-                profile_dict['Total'] += 1
-
-                # Generalize personal profile pattern here
-                if profile_dict['Total'] < self.profile_threshold:
-                    profile_dict['Pattern'].append(response.url)
-
-                    if UniversityWebCrawlerRefined.IS_PRINT_VERBOSE:
-                        # Log information
-                        self.logger.info('FOUND 1 ITEM at %s (depth: %s, item: %s, start: %s)' %
-                                         (response.url, current_depth,
-                                          profile_dict['Total'], response.meta['Original Start']))
-
-                    # Process the profile item
-                    item = self.process_profile_item(response, current_unique)
-                    if item is not None:
-                        yield item
-                else:
-                    # Compile patterns when reaching the threshold
-                    if profile_dict['Total'] == self.profile_threshold:
-                        profile_dict['Compiled'] = self.compile_pattern(profile_dict['Pattern'], response)
-
-                    # If the number of items exceeds threshold, only yield item when the link matches the pattern
-                    if self.match_pattern(profile_dict['Compiled'], response.url):
-                        if UniversityWebCrawlerRefined.IS_PRINT_VERBOSE:
-                            # Log information
-                            self.logger.info('FOUND 1 ITEM at %s (depth: %s, item: %s, start: %s)' %
-                                             (response.url, current_depth, profile_dict['Total'],
-                                              response.meta['Original Start']))
-
-                        # Process the profile item
-                        item = self.process_profile_item(response, current_unique)
-                        if item is not None:
-                            yield item
-                return
+            # Check the cheaper condition first and look for person names in the extraction executor otherwise
+            if is_personal:
+                item = self.process_profile_page(context, current_unique, current_depth)
+            else:
+                item = self.extraction_executor.submit(has_person_name, [response.meta['Title'], current_unique])
+                item.addCallback(lambda found: self.process_profile_page(context, current_unique, current_depth)
+                                 if found else None)
+            if item is not None:
+                yield item
+            return
 
         # If path differs, go back to parse_menu (assumed to happen at depth <= 1 and hence skip the conditioning above)
+        # Warm start seeds are requested directly without any previous page
         current_path = self.get_netloc_and_path_level(response.url)[1]
-        previous_path = self.get_netloc_and_path_level(response.meta['Past Response'][-1].url)[1]
+        previous_url = response.meta['Past Fingerprint'][-1].url if len(response.meta['Past Fingerprint']) > 0 \
+            else response.url
+        previous_path = self.get_netloc_and_path_level(previous_url)[1]
         if self.is_direct_to_different_path(current_path, previous_path):
             if not response.meta.get('Fall Back', False):
                 # Allow only one-time fall-back
@@ -528,7 +640,7 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
         # Recursively yield request at current call back
         # Get current response metadata
         # Get unique content of current response (fallback to general when empty)
-        main_content = get_main_content_unique(response, response.meta['Past Response'])
+        main_content = get_main_content_unique(context, response.meta['Past Fingerprint'])
         if response.meta.get('XML', False):
             to_parse = html.fromstring(response.body)
             link_href = to_parse.xpath('//a[@href]/@href')
@@ -538,14 +650,14 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
         # If main content still contains zero components, it is probably a AJAX-enabled page
         # Simulate a XML document call by heuristics
         if len(main_content) == 0:
-            response.meta['depth'] -= 1
             new_meta = response.meta.copy()
-            new_meta['depth'] = response.meta['depth']
+            new_meta['Same Depth'] = True
             new_meta['XML'] = True
             yield Request(response.urljoin(response.url.replace('html', 'xml')), self.parse_people, meta=new_meta,
                           errback=self.errback_report)
 
         # Iterate through each component
+        current_fingerprint = ResponseFingerprint(context)
         for content_text, content_href in main_content.items():
             if url_has_any_extension(content_href, self.denied_extension) | self.link_contain_keyword(content_href):
                 # Filter link first
@@ -563,11 +675,12 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                 'Link': content_href,
                 'Title': content_text,
                 'depth': current_depth + 1,
-                'Past Response': response.meta['Past Response'] + [current_response],
+                'Past Fingerprint': response.meta['Past Fingerprint'] + [current_fingerprint],
 
                 # Some basic record-based data
                 'University Name': response.meta['University Name'],
                 'Original Start': response.meta['Original Start'],
+                'Seed Start': response.meta.get('Seed Start'),
                 'Previous Link': response.url,
                 'Is Department': response.meta['Is Department'],
                 'tag': response.meta.get('tag', 'None')
@@ -578,90 +691,119 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
             content_request = Request(content_href, self.parse_people, meta=content_meta, errback=self.errback_report)
             yield content_request
 
-    def process_profile_item(self, response, unique_title, len_lim=10):
+    def process_profile_page(self, context, current_unique, current_depth):
+        # Count the page identified as a profile and process it as a profile item unless it does not match the
+        # pattern compiled for the department
+        # Get the dictionary of the department again as it may have been evicted while identifying the page
+        profile_dict = self.possible_profile_page.get(context.meta['Original Start'])
+        profile_dict['Total'] += 1
+
+        # Generalize personal profile pattern here
+        if profile_dict['Total'] < self.profile_threshold:
+            profile_dict['Pattern'].append(context.url)
+        else:
+            # Compile patterns when reaching the threshold
+            if profile_dict['Total'] == self.profile_threshold:
+                self.possible_profile_page.set_compiled(context.meta['Original Start'],
+                                                        self.compile_pattern(profile_dict['Pattern'], context))
+
+            # If the number of items exceeds threshold, only yield item when the link matches the pattern
+            if not self.match_pattern(profile_dict['Compiled'], context.url):
+                return None
+
+        if UniversityWebCrawlerRefined.IS_PRINT_VERBOSE:
+            # Log information
+            self.logger.info('FOUND 1 ITEM at %s (depth: %s, item: %s, start: %s)' %
+                             (context.url, current_depth, profile_dict['Total'], context.meta['Original Start']))
+
+        # Process the profile item
+        return self.process_profile_item(context, current_unique)
+
+    def process_profile_item(self, context, unique_title, len_lim=10):
         # Key function to parse profile items
+        # Only mark the profile as seen if neither its main text nor the fields taken from the page it has been
+        # reached from have changed since the last crawl, and skip pages rejected before in the same way
+        content_hash = self.get_profile_hash(context)
+        if self.rejected_hash.get(context.url) == content_hash:
+            self.crawler.stats.inc_value('profile/skipped_rejected', spider=self)
+            return None
+        if self.profile_hash.get(context.url) == content_hash:
+            self.crawler.stats.inc_value('profile/skipped', spider=self)
+            self.directory_seeds.record(context.meta)
+            profile_seen = ProfileSeenItem()
+            profile_seen['profile_link'] = context.url
+            profile_seen['content_hash'] = content_hash
+            return profile_seen
+
+        # Extract the text to analyze from the response and identify the name, position and year information in the
+        # extraction executor
+        h1_h2_h3 = [element for key, value in get_title_h1_h2_h3(context).items()
+                    for element in value if key in ['h1', 'h2', 'h3']]
+        main_text = generic_get_unique_content(context, context.meta['Past Fingerprint'][-1], get_text=True)
+        text_groups = list(get_text_group(context))
+        deferred = self.extraction_executor.submit(extract_profile_information, context.meta['Title'], unique_title,
+                                                   h1_h2_h3, main_text, text_groups, len_lim)
+        deferred.addCallback(self.process_profile_year_info, context, content_hash, len_lim)
+        return deferred
+
+    @staticmethod
+    def get_profile_hash(context):
+        # Hash of the main text along with the department, title and tag carried from the page linking to it
+        meta_fields = [context.meta['Original Start'][1], context.meta['Title'], context.meta.get('tag', 'None')]
+        return hashlib.md5('\n'.join([get_content_hash(context)] + [str(field) for field in meta_fields])
+                           .encode('utf-8')).hexdigest()
+
+    def reject_profile_item(self, context, content_hash):
+        # Record the hash of a page found not to be of a professor
+        self.rejected_hash[context.url] = content_hash
+        profile_rejected = ProfileRejectedItem()
+        profile_rejected['profile_link'] = context.url
+        profile_rejected['content_hash'] = content_hash
+        return profile_rejected
+
+    @staticmethod
+    def find_profile_name(title, unique_title, h1_h2_h3):
         # ----------------------------------NAME COMPONENT CODE----------------------------------
         # Parse title first to find person's name
         name = 'Unknown'
-        if len(self.parse_entity(response.meta['Title'])) >= 1:
+        if len(UniversityWebCrawlerRefined.parse_entity(title)) >= 1:
             # If entity is identified in the metadata title
-            name = response.meta['Title']
-        elif len(self.parse_entity(unique_title)) >= 1:
+            name = title
+        elif len(UniversityWebCrawlerRefined.parse_entity(unique_title)) >= 1:
             # If entity is identified in the current unique title
             name = unique_title
         else:
             # Identify named entity in h1, h2 and h3 text
-            h1_h2_h3 = [element for key, value in get_title_h1_h2_h3(response).items()
-                        for element in value if key in ['h1', 'h2', 'h3']]
-            h1_h2_h3_parsed = list(filter(lambda y: len(y) > 0, map(lambda x: self.parse_entity(x), h1_h2_h3)))
+            h1_h2_h3_parsed = list(filter(lambda y: len(y) > 0,
+                                          UniversityWebCrawlerRefined.ENTITY_RECOGNIZER.parse_entity_list(h1_h2_h3)))
             h1_h2_h3_entity = [name for name_list in list(map(lambda x: list(x.keys()), h1_h2_h3_parsed))
                                for name in name_list]
 
             # Select first occurrence
             name = name if len(h1_h2_h3_entity) <= 0 else h1_h2_h3_entity[0]
+        return name
 
+    @staticmethod
+    def find_profile_position(title, rule_engine, len_lim):
         # ----------------------------------POSITION/APPOINTMENT COMPONENT CODE----------------------------------
         # Parse and mine main text, find professor first
-        position = 'Non-Professor'
-        main_text = generic_get_unique_content(response, response.meta['Past Response'][-1], get_text=True)
-
         # For the simplest case, find position title in name
-        if response.meta['Title'].lower().startswith('prof'):
-            position = 'Professor'
-        elif response.meta['Title'].lower().startswith('assistant') | response.meta['Title'].lower().startswith('asst'):
-            position = 'Assistant Professor'
-        elif response.meta['Title'].lower().startswith('associate') | response.meta['Title'].lower().startswith('asso'):
-            position = 'Associate Professor'
-        else:
-            # Find in longer main text otherwise, start from shorter length and expand subsequently
-            assoc_prof_re = r'(associate|(assoc\.?)) prof[\.]?[ ]?'
-            assist_prof_re = r'(assistant|(asst\.?)) prof[\.]?[ ]?'
-            prof_re = r'prof\.|professor'
-            if len(list(filter(lambda x: re.search(assoc_prof_re,
-                                                   x.lower()) and len(x.split(' ')) <= len_lim, main_text))) >= 1:
-                position = 'Associate Professor'
-            if len(list(filter(lambda x: re.search(assist_prof_re,
-                                                   x.lower()) and len(x.split(' ')) <= len_lim, main_text))) >= 1:
-                position = 'Assistant Professor'
-            if len(list(filter(lambda x: 'professor' in x.lower() and len(x.split(' ')) <= 1, main_text))) >= 1:
-                position = 'Professor'
-            else:
-                not_assist = list(filter(lambda x: not re.search(assist_prof_re, x.lower()), main_text))
-                not_assoc = list(filter(lambda x: not re.search(assoc_prof_re, x.lower()), main_text))
-                remain = set([element for element in (not_assoc + not_assoc)
-                              if element in not_assist and element in not_assoc])
-                if len(list(filter(lambda x: re.search(prof_re,
-                                                       x.lower()) and len(x.split(' ')) <= len_lim, remain))) >= 1:
-                    position = 'Professor'
+        if title.lower().startswith('prof'):
+            return 'Professor'
+        elif title.lower().startswith('assistant') | title.lower().startswith('asst'):
+            return 'Assistant Professor'
+        elif title.lower().startswith('associate') | title.lower().startswith('asso'):
+            return 'Associate Professor'
 
-        # ----------------------------------YEAR INFORMATION COMPONENT CODE----------------------------------
-        if position != 'Non-Professor':
+        # Find in longer main text otherwise, with all position rules evaluated by the rule engine
+        return rule_engine.get_position(len_lim)
 
-            year_info = get_key_information(response)
+    def process_profile_year_info(self, profile_information, context, content_hash, len_lim):
+        # Continue with the name, position and year information returned by the extraction executor
+        name, position, year_info = profile_information
 
-            # ----------------------------------PDF (RESUME) COMPONENT CODE----------------------------------
-            links = get_main_content_unique(response, response.meta['Past Response'])
-            pdf_links = {key: value for key, value in links.items()
-                         if ('.pdf' in value) & (('cv' in value) or ('resum' in value) or ('vitam' in value))}
-            for pdf_title, pdf_link in pdf_links.items():
-                # Assume that resume contains more accurate information and overwrite
-                self.logger.info('Found resume link: %s' % pdf_link)
-                pdf_response = requests.get(response.urljoin(pdf_link))
-                reader = PdfFileReader(io.BytesIO(pdf_response.content))
-                text_content_list = []
-                for page_number in range(reader.getNumPages()):
-                    text_content_list.extend(reader.getPage(page_number).extractText().split())
-                year_info_new = self.parse_year_info(main_text=text_content_list, len_lim=len_lim)
-                if year_info_new.count('Unknown') < year_info.count('Unknown'):
-                    year_info = year_info_new
-
-            if year_info[0] != 'Unknown':
-                if int(year_info[0]) > datetime.now().year:
-                    year_info[0] = 'Unknown'
-
-            if year_info[2] != 'Unknown':
-                if int(year_info[2]) > datetime.now().year:
-                    year_info[2] = 'Unknown'
+        # ----------------------------------YEAR INFORMATION COMPONENT CODE----------------------------------
+        if position != 'Non-Professor':
 
             profile = ProfilePageItem()
             name_before = re.sub(r'\(\d+\)', '', name).split(' ')
@@ -674,66 +816,124 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                     profile['name'] = ' '.join(name_before[:3])
                 if len(name.strip()) <= 0:
                     profile['name'] = 'Unknown'
-                profile['department'] = response.meta['Original Start'][1]
-                profile['university'] = response.meta['University Name']
-                profile['profile_link'] = response.url
-                profile['position'] = position
-                profile['phd_year'] = str(year_info[0])
-                profile['phd_school'] = year_info[1]
-                profile['promotion_year'] = str(year_info[2])
-                self.logger.info(str(profile))
-                profile['text_raw'] = year_info[3]
-                profile['tag'] = response.meta.get('tag', 'None')
-                return profile
             except IndexError:
-                pass
+                return self.reject_profile_item(context, content_hash)
+            profile['department'] = context.meta['Original Start'][1]
+            profile['university'] = context.meta['University Name']
+            profile['profile_link'] = context.url
+            profile['position'] = position
+            profile['tag'] = context.meta.get('tag', 'None')
+            profile['content_hash'] = content_hash
+            self.directory_seeds.record(context.meta)
+
+            # ----------------------------------PDF (RESUME) COMPONENT CODE----------------------------------
+            links = get_main_content_unique(context, context.meta['Past Fingerprint'])
+            pdf_links = {key: value for key, value in links.items()
+                         if ('.pdf' in value) & (('cv' in value) or ('resum' in value) or ('vitam' in value))}
+            resume_links = [context.urljoin(pdf_link) for pdf_link in pdf_links.values()]
+            if len(resume_links) > 0:
+                # Assume that resume contains more accurate information and overwrite
+                # Fetch the resume through the downloader and yield the item once every resume has been parsed
+                return self.request_resume(profile, year_info, resume_links, len_lim)
+
+            return self.fill_profile_item(profile, year_info)
 
-        return
+        return self.reject_profile_item(context, content_hash)
 
-    def parse_year_info(self, main_text, len_lim):
-        # Function to process year information
-        def find_time_information(string_list):
-            # Help function to find year format
-            filtered = list(filter(lambda x: re.search(r'(?:19|20)\d{2}',
-                                                       x.lower()) and 'student' not in x.lower(), string_list))
-            return list(map(lambda x: re.findall(r'(?:19|20)\d{2}', x), filtered))
+    def request_resume(self, profile, year_info, resume_links, len_lim):
+        # Request the first resume link and carry the pending profile item with the remaining links
+        self.logger.info('Found resume link: %s' % resume_links[0])
+        resume_meta = {
+            'Profile Item': profile,
+            'Year Info': year_info,
+            'Resume Links': resume_links[1:],
+            'Length Limit': len_lim,
 
+            # Keep the depth of the profile page so that the resume request is not dropped at the depth limit
+            'Same Depth': True
+        }
+        return Request(resume_links[0], callback=self.parse_resume, meta=resume_meta, dont_filter=True,
+                       errback=self.errback_resume)
+
+    def parse_resume(self, response):
+        # Extract the resume text and parse year information from it in the extraction executor, as reading the PDF
+        # holds the interpreter lock and would stall the reactor in a thread
+        deferred = self.extraction_executor.submit(extract_resume_year_info, response.body,
+                                                   response.meta['Length Limit'])
+        deferred.addCallback(self.merge_resume_year_info, response.meta)
+        deferred.addErrback(self.skip_resume, response.meta)
+        return deferred
+
+    def merge_resume_year_info(self, year_info_new, resume_meta):
+        # Overwrite year information from the page if the resume gives more of it
+        year_info = resume_meta['Year Info']
+        if year_info_new.count('Unknown') < year_info[:3].count('Unknown'):
+            year_info = list(year_info_new) + year_info[3:]
+        return self.continue_resume(resume_meta, year_info)
+
+    def skip_resume(self, failure, resume_meta):
+        # Keep the year information so far when the resume cannot be parsed
+        self.logger.info('Failed to parse resume for %s: %s' % (resume_meta['Profile Item']['profile_link'],
+                                                                failure.getErrorMessage()))
+        return self.continue_resume(resume_meta, resume_meta['Year Info'])
+
+    def errback_resume(self, failure):
+        # Keep the year information so far when the resume cannot be downloaded
+        self.errback_report(failure)
+        return self.continue_resume(failure.request.meta, failure.request.meta['Year Info'])
+
+    def continue_resume(self, resume_meta, year_info):
+        # Request the next resume link or yield the item when none is left
+        if len(resume_meta['Resume Links']) > 0:
+            return [self.request_resume(resume_meta['Profile Item'], year_info, resume_meta['Resume Links'],
+                                        resume_meta['Length Limit'])]
+        return [self.fill_profile_item(resume_meta['Profile Item'], year_info)]
+
+    def fill_profile_item(self, profile, year_info):
+        # Fill in year information of the profile item
+        if year_info[0] != 'Unknown':
+            if int(year_info[0]) > datetime.now().year:
+                year_info[0] = 'Unknown'
+
+        if year_info[2] != 'Unknown':
+            if int(year_info[2]) > datetime.now().year:
+                year_info[2] = 'Unknown'
+
+        profile['phd_year'] = str(year_info[0])
+        profile['phd_school'] = year_info[1]
+        profile['promotion_year'] = str(year_info[2])
+        self.logger.info(str(profile))
+        profile['text_raw'] = year_info[3]
+
+        # Count new and updated profiles against the hashes stored before the crawl
+        is_updated = profile['profile_link'] in self.profile_hash
+        self.crawler.stats.inc_value('profile/updated' if is_updated else 'profile/new', spider=self)
+        self.profile_hash[profile['profile_link']] = profile['content_hash']
+        return profile
+
+    @staticmethod
+    def parse_year_info(rule_engine, len_lim):
+        # Function to process year information from the lines matched by the rule engine
         def process_school_list(school_list):
             # Help function to process school list
-            def match_school_name(school_a_name, school_b_name):
-                return SequenceMatcher(None, school_a_name, school_b_name).ratio()
-            college_name = UniversityWebCrawlerRefined.college_list
-            school_list_filter = list(filter(lambda x: re.search(r'univ|insti', x) or (max(list(map(lambda y: match_school_name(y.lower(), x.lower()), college_name))) >= 0.5), school_list))
+            college_index = UniversityWebCrawlerRefined.COLLEGE_INDEX_IGNORE_CASE
+            school_list_filter = list(filter(lambda x: re.search(r'univ|insti', x) or college_index.has_match(x, 0.5),
+                                             school_list))
             return sorted(school_list_filter, key=lambda x: school_list_filter.count(x), reverse=True)
 
-        def find_neighbors(target_list, original_list):
-            # Help function to find neighbors
-            new_list = []
-            for target in target_list:
-                ori_index = original_list.index(target)
-                if ori_index - 1 >= 0:
-                    if original_list[ori_index-1] not in new_list:
-                        new_list.append(original_list[ori_index-1])
-                if target not in new_list:
-                    new_list.append(target)
-                if ori_index + 1 < len(original_list):
-                    if original_list[ori_index+1] not in new_list:
-                        new_list.append(original_list[ori_index+1])
-            return new_list
-
         # Select maximum year conservatively by default
         phd_year = 'Unknown'
         phd_school = 'Unknown'
-        prof_re = r'prof\.|professor'
         prof_year = 'Unknown'
-        phd_string = list(filter(lambda x: (re.search(r'(ph\.?[ ]?d\.?[ ]?)|(d\.?[ ]?phil\.?[ ]?)', x.lower())) and
-                                           ('student' not in x.lower()) and
-                                           (len(x.split(' ')) <= len_lim), main_text))
-        phd_year_list = find_time_information(phd_string)
+        phd_index = rule_engine.select('PhD', len_lim, exclude_student=True)
+        phd_string = rule_engine.get_text(phd_index)
+        phd_year_list = rule_engine.get_year(phd_index)
+        phd_neighbors = rule_engine.get_neighbors(phd_index)
 
         # Ignore acronym wrapped in brackets
         phd_string_sub = list(map(lambda x: re.sub(r'\([A-Z][A-Z]+\)', ' ', x), phd_string))
-        phd_school_list = process_school_list(self.find_entity_list(phd_string_sub, only_org=True))
+        phd_school_list = process_school_list(UniversityWebCrawlerRefined.find_entity_list(phd_string_sub,
+                                                                                           only_org=True))
 
         if phd_year == 'Unknown':
             # Get PhD graduation year
@@ -742,8 +942,7 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                 phd_year_flatten = [int(year) for year_list in phd_year_list for year in year_list]
                 phd_year = phd_year_flatten[0]
             else:
-                phd_string_with_neighbors = find_neighbors(phd_string, main_text)
-                phd_year_list = find_time_information(phd_string_with_neighbors)
+                phd_year_list = rule_engine.get_year(phd_neighbors)
                 phd_year_flatten = [int(year) for year_list in phd_year_list for year in year_list]
                 if len(phd_year_flatten) > 0:
                     phd_year = phd_year_flatten[0]
@@ -755,31 +954,28 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
                 phd_school = phd_school_list[0]
             else:
                 phd_string_with_neighbors = list(map(lambda x: re.sub(r'\(.+\)', ' ', x),
-                                                     find_neighbors(phd_string, main_text)))
-                phd_school_list = process_school_list(self.find_entity_list(phd_string_with_neighbors, only_org=True))
+                                                     rule_engine.get_text(phd_neighbors)))
+                phd_school_list = process_school_list(
+                    UniversityWebCrawlerRefined.find_entity_list(phd_string_with_neighbors, only_org=True))
                 if len(phd_school_list) > 0:
                     phd_school = phd_school_list[0]
 
             # Update and normalize phd school name
-            phd_school_sort = sorted(UniversityWebCrawlerRefined.college_list,
-                                     key=lambda x: SequenceMatcher(None, x, phd_school).ratio(),
-                                     reverse=True)
-            if SequenceMatcher(None, phd_school_sort[0], phd_school).ratio() >= 0.6:
-                phd_school = phd_school_sort[0]
+            phd_school_match, phd_school_score = UniversityWebCrawlerRefined.COLLEGE_INDEX.get_top_match(phd_school)
+            if phd_school_score >= 0.6:
+                phd_school = phd_school_match
 
         if prof_year == 'Unknown':
             # Get promotion year
-            prof_string = list(filter(lambda x: (re.search(prof_re, x.lower())) and
-                                                (len(x.split(' ')) <= len_lim), main_text))
-            prof_year_list = find_time_information(prof_string)
+            prof_index = rule_engine.select('Professor', len_lim)
+            prof_year_list = rule_engine.get_year(prof_index)
 
             if len(prof_year_list) > 0:
                 # Find information around neighbours
                 prof_year_flatten = [int(year) for year_list in prof_year_list for year in year_list]
                 prof_year = prof_year_flatten[0]
             else:
-                prof_string_with_neighbors = find_neighbors(prof_string, main_text)
-                prof_year_list = find_time_information(prof_string_with_neighbors)
+                prof_year_list = rule_engine.get_year(rule_engine.get_neighbors(prof_index))
                 prof_year_flatten = [int(year) for year_list in prof_year_list for year in year_list]
                 if len(prof_year_flatten) > 0:
                     prof_year = prof_year_flatten[0]
@@ -853,6 +1049,41 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
             'Redirected': is_redirected
         }
 
+    def report_cache_stats(self):
+        # Expose the menu classification and named entity cache counters in the crawl stats
+        # Entity cache counters are those of the crawler process as each extraction worker keeps its own cache
+        stats = self.crawler.stats
+        stats.set_value('menu_cache/hit', self.menu_cache.hits, spider=self)
+        stats.set_value('menu_cache/miss', self.menu_cache.misses, spider=self)
+        stats.set_value('menu_cache/size', len(self.menu_cache), spider=self)
+        for key, value in UniversityWebCrawlerRefined.ENTITY_RECOGNIZER.get_stats().items():
+            stats.set_value('entity_cache/%s' % key, value, spider=self)
+        # Count the extraction tasks run in the crawler process as the waiting queue was full
+        stats.set_value('extraction/inline', self.extraction_executor.inline, spider=self)
+
+    def closed(self, reason):
+        # Stop the worker pool when the spider is closed
+        self.extraction_executor.close()
+        self.possible_profile_page.close()
+        self.directory_seeds.close()
+
+    def resolve_deferred_output(self, output):
+        # Replace Deferred objects in the callback output with their results
+        output = list(output)
+        deferred_index = [index for index, element in enumerate(output) if isinstance(element, defer.Deferred)]
+        if len(deferred_index) == 0:
+            return output
+
+        def replace_result(results):
+            for index, (success, result) in zip(deferred_index, results):
+                if not success:
+                    self.logger.info('Minor error occurs at profile extraction: %s' % result.getErrorMessage())
+                output[index] = result if success else None
+            return [element for element in output if element is not None]
+
+        return defer.DeferredList([output[index] for index in deferred_index],
+                                  consumeErrors=True).addCallback(replace_result)
+
     def parse(self, response):
         # Compulsory override but skipped for this class
         pass
@@ -870,9 +1101,9 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
         return False
 
     @staticmethod
-    def process_possible_named_entity(response):
+    def process_possible_named_entity(context):
         # Text-wise comparison
-        text_content = generic_get_unique_content(response, response.meta['Past Response'], get_text=True)
+        text_content = generic_get_unique_content(context, context.meta['Past Fingerprint'], get_text=True)
         have_publication = list(filter(lambda x: ('publicati' in x.lower()) & (len(x.split(' ')) <= 5), text_content))
         have_research_interest = list(filter(lambda x: ('interest' in x.lower()) & (len(x.split(' ')) <= 5),
                                              text_content))
@@ -894,44 +1125,55 @@ class UniversityWebCrawlerRefined(scrapy.Spider):
 
     @staticmethod
     def parse_entity(target_string, including_org=True, only_org=False):
-
-        def normalize_string_space(string_before):
-            return ' '.join(string_before.split())
-
-        def contain_filter_word(test_string, word_list):
-            for word in word_list:
-                if word in test_string.lower():
-                    return True
-            return False
-
-        parsed = UniversityWebCrawlerRefined.SIMILARITY_NAVIGATOR.model_en(target_string).ents
-
         # Include ORG here as spacy is not capable of identifying all kinds of names
-        if only_org:
-            entity_dict = {normalize_string_space(entity.string): entity.label_ for entity in parsed
-                           if entity.label_ in ['ORG']}
-            entity_dict = {key: value for key, value in entity_dict.items()
-                           if not contain_filter_word(key, UniversityWebCrawlerRefined.ENTITY_FILTER_KEYWORD)}
-        elif including_org:
-            entity_dict = {normalize_string_space(entity.string): entity.label_ for entity in parsed
-                           if entity.label_ in ['PERSON', 'ORG']}
-            # Filter
-            entity_dict = {key: value for key, value in entity_dict.items()
-                           if not contain_filter_word(key, UniversityWebCrawlerRefined.ENTITY_FILTER_KEYWORD)}
-        else:
-            entity_dict = {normalize_string_space(entity.string): entity.label_ for entity in parsed
-                           if entity.label_ in ['PERSON']}
-            # Filter
-            entity_dict = {key: value for key, value in entity_dict.items()
-                           if not contain_filter_word(key, UniversityWebCrawlerRefined.ENTITY_FILTER_KEYWORD)}
-        return entity_dict
+        return UniversityWebCrawlerRefined.ENTITY_RECOGNIZER.parse_entity(
+            target_string, mode=UniversityWebCrawlerRefined.get_entity_mode(including_org, only_org))
 
     @staticmethod
     def find_entity_list(string_list, including_org=True, only_org=False):
-        # Parse entity
-        string_list_parsed = list(map(lambda x: UniversityWebCrawlerRefined.parse_entity(x,
-                                                                                         including_org=including_org,
-                                                                                         only_org=only_org),
-                                      string_list))
+        # Parse entity of the whole list in one batch
+        string_list_parsed = UniversityWebCrawlerRefined.ENTITY_RECOGNIZER.parse_entity_list(
+            string_list, mode=UniversityWebCrawlerRefined.get_entity_mode(including_org, only_org))
         flattened = [element for dictionary in string_list_parsed for element in list(dictionary.keys())]
         return flattened
+
+    @staticmethod
+    def get_entity_mode(including_org=True, only_org=False):
+        if only_org:
+            return 'only_org'
+        elif including_org:
+            return 'including_org'
+        else:
+            return 'person'
+
+
+def extract_name_and_position(title, unique_title, h1_h2_h3, main_text, len_lim):
+    # Entry of the extraction executor to identify the name and position of a profile
+    # Only look for the name of professors as the item is dropped otherwise
+    position = UniversityWebCrawlerRefined.find_profile_position(title, ProfileRuleEngine(main_text), len_lim)
+    if position == 'Non-Professor':
+        return 'Unknown', position
+    return UniversityWebCrawlerRefined.find_profile_name(title, unique_title, h1_h2_h3), position
+
+
+def extract_profile_information(title, unique_title, h1_h2_h3, main_text, text_groups, len_lim):
+    # Entry of the extraction executor to identify the name and position of a profile, along with the year
+    # information from the text groups of the page for professors
+    name, position = extract_name_and_position(title, unique_title, h1_h2_h3, main_text, len_lim)
+    if position == 'Non-Professor':
+        return name, position, None
+    return name, position, list(get_group_information(text_groups))
+
+
+def has_person_name(string_list):
+    # Entry of the extraction executor to check whether any of the strings has a person name, in order
+    for string in string_list:
+        if len(UniversityWebCrawlerRefined.parse_entity(string, including_org=False)) >= 1:
+            return True
+    return False
+
+
+def extract_resume_year_info(pdf_body, len_lim):
+    # Entry of the extraction executor to parse year information from the body of a resume in PDF
+    return UniversityWebCrawlerRefined.parse_year_info(rule_engine=ProfileRuleEngine(get_resume_text(pdf_body)),
+                                                       len_lim=len_lim)
@@ -0,0 +1,109 @@
+import numpy
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+
+class CollegeNameIndex(object):
+
+    # This class is intended to fuzzy-match a string against a fixed list of college names with the
+    # same score as SequenceMatcher(None, college_name, query).ratio(), without computing the ratio
+    # against every name
+
+    # The few names sharing the most character n-grams with the query are scored first, and the others are
+    # then visited by descending upper bound of the ratio given by shared characters, stopping as soon as the
+    # bound cannot beat the score found so far, so results are exactly those of a full scan over the list
+
+    NGRAM = 3
+    NGRAM_SEED = 3
+
+    def __init__(self, names, ignore_case=False):
+        self.names = list(names)
+        self.ignore_case = ignore_case
+        self.keys = [self.normalize(name) for name in self.names]
+        self.lengths = numpy.array([len(key) for key in self.keys], dtype='float64')
+
+        # Character count matrix in the shape of (name, character) for the shared character bound
+        self.alphabet = {char: column for column, char in enumerate(sorted(set(''.join(self.keys))))}
+        self.char_count = numpy.zeros((len(self.keys), len(self.alphabet)), dtype='float64')
+        for row, key in enumerate(self.keys):
+            for char, count in Counter(key).items():
+                self.char_count[row, self.alphabet[char]] = count
+
+        self.ngram_index = defaultdict(set)
+        for index, key in enumerate(self.keys):
+            for ngram in self.get_ngram(key):
+                self.ngram_index[ngram].add(index)
+
+    def get_top_match(self, query):
+        # Return the name with the highest ratio (first in list order on ties) and its ratio
+        best_index = None
+        best_score = -1.0
+        for index, score in self.scan(query, lambda index: (best_score, best_index is not None and index > best_index)):
+            if (score > best_score) or (score == best_score and index < best_index):
+                best_index, best_score = index, score
+
+        if best_index is None:
+            return None, 0.0
+        return self.names[best_index], best_score
+
+    def has_match(self, query, threshold):
+        # Tell whether any name reaches the threshold ratio
+        for index, score in self.scan(query, lambda index: (threshold, False)):
+            if score >= threshold:
+                return True
+        return False
+
+    def scan(self, query, get_cutoff):
+        # Yield (index, ratio) of every name whose ratio upper bound reaches the cutoff of the caller
+        # The cutoff is given as (score, is_strict) so that ties can be skipped when they cannot win
+        query_key = self.normalize(query)
+        upper_bound = self.get_upper_bound(query_key)
+
+        # The query is the second sequence as SequenceMatcher caches information about it
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(query_key)
+
+        # Score the most promising names first to raise the cutoff early
+        seed = self.get_ngram_candidate(query_key)[:self.NGRAM_SEED]
+        for index in seed:
+            cutoff, is_strict = get_cutoff(index)
+            if self.reach_cutoff(upper_bound[index], cutoff, is_strict):
+                matcher.set_seq1(self.keys[index])
+                yield index, matcher.ratio()
+
+        # Visit the rest by descending upper bound and list order on ties
+        for index in numpy.lexsort((numpy.arange(len(self.keys)), -upper_bound)):
+            if index in seed:
+                continue
+            cutoff, is_strict = get_cutoff(index)
+            if upper_bound[index] < cutoff:
+                break
+            if self.reach_cutoff(upper_bound[index], cutoff, is_strict):
+                matcher.set_seq1(self.keys[index])
+                yield int(index), matcher.ratio()
+
+    def get_upper_bound(self, query_key):
+        # Upper bound of the ratio of each name from the characters shared with the query
+        query_count = numpy.zeros(len(self.alphabet), dtype='float64')
+        for char, count in Counter(query_key).items():
+            if char in self.alphabet:
+                query_count[self.alphabet[char]] = count
+        shared = numpy.minimum(self.char_count, query_count).sum(axis=1)
+        total_length = self.lengths + len(query_key)
+        return numpy.where(total_length > 0, 2.0 * shared / numpy.maximum(total_length, 1), 1.0)
+
+    def get_ngram_candidate(self, query_key):
+        # Names sharing n-grams with the query, by descending number of shared n-grams and list order on ties
+        shared_count = Counter(index for ngram in self.get_ngram(query_key) for index in self.ngram_index.get(ngram, ()))
+        return sorted(shared_count.keys(), key=lambda index: (-shared_count[index], index))
+
+    def normalize(self, string):
+        return string.lower() if self.ignore_case else string
+
+    @staticmethod
+    def reach_cutoff(bound, cutoff, is_strict):
+        return bound > cutoff if is_strict else bound >= cutoff
+
+    @staticmethod
+    def get_ngram(string, n=NGRAM):
+        return set(string[index:index + n] for index in range(max(len(string) - n + 1, 1)))
@@ -0,0 +1,89 @@
+import datetime
+import sqlite3
+from collections import defaultdict
+
+
+class DirectorySeedStore(object):
+
+    # This class is intended to remember the staff directory pages that produced profile items for each
+    # seed start (the pair of department URL and title read as input), so that a warm start crawl can
+    # request them directly instead of discovering them again from the department homepage
+
+    # Directory pages are recorded in memory during the crawl and saved when the spider is closed, while
+    # seeds requested again that produce nothing are removed
+
+    SEED_LIMIT = 5
+
+    def __init__(self, database_path, seed_limit=None):
+        self.seed_limit = seed_limit if seed_limit is not None else self.SEED_LIMIT
+        self.connection = sqlite3.connect(database_path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS directory_seeds '
+                                '(seed_url TEXT NOT NULL, '
+                                'seed_title TEXT, '
+                                'directory_url TEXT NOT NULL, '
+                                'original_url TEXT NOT NULL, '
+                                'original_title TEXT, '
+                                'university TEXT, '
+                                'is_department TEXT, '
+                                'tag TEXT, '
+                                'item_count INTEGER NOT NULL, '
+                                'last_found TEXT, '
+                                'PRIMARY KEY (seed_url, seed_title, directory_url))')
+        self.connection.commit()
+
+        # Load the directory pages by seed start with the most productive first
+        self.seeds = defaultdict(list)
+        for row in self.connection.execute('SELECT seed_url, seed_title, directory_url, original_url, original_title, '
+                                           'university, is_department, tag FROM directory_seeds '
+                                           'ORDER BY item_count DESC, last_found DESC'):
+            self.seeds[(row[0], row[1])].append({
+                'Directory': row[2],
+                'Original Start': (row[3], row[4]),
+                'University Name': row[5],
+                'Is Department': row[6],
+                'tag': row[7]
+            })
+
+        self.found = {}
+        self.requested = set()
+
+    def get_seeds(self, seed_start):
+        # Get the directory pages recorded for the seed start, marking them as requested in this crawl
+        seeds = self.seeds.get(tuple(seed_start), [])[:self.seed_limit]
+        for seed in seeds:
+            self.requested.add((tuple(seed_start), seed['Directory']))
+        return seeds
+
+    def record(self, response_meta):
+        # Count a profile item found under the directory page the profile has been linked from
+        if response_meta.get('Seed Start') is None:
+            return
+        key = (tuple(response_meta['Seed Start']), response_meta['Previous Link'])
+        if key not in self.found:
+            self.found[key] = {
+                'Original Start': tuple(response_meta['Original Start']),
+                'University Name': response_meta['University Name'],
+                'Is Department': response_meta['Is Department'],
+                'tag': response_meta.get('tag', 'None'),
+                'Count': 0
+            }
+        self.found[key]['Count'] += 1
+
+    def count_found(self, seed_start):
+        # Number of profile items found for the seed start in this crawl
+        return sum(value['Count'] for key, value in self.found.items() if key[0] == tuple(seed_start))
+
+    def close(self):
+        # Save the directory pages found in this crawl and remove requested seeds that produced nothing
+        last_found = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.connection.executemany('INSERT OR REPLACE INTO directory_seeds (seed_url, seed_title, directory_url, '
+                                    'original_url, original_title, university, is_department, tag, item_count, '
+                                    'last_found) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                    [key[0] + (key[1], ) + value['Original Start'] +
+                                     (value['University Name'], value['Is Department'], value['tag'], value['Count'],
+                                      last_found) for key, value in self.found.items()])
+        self.connection.executemany('DELETE FROM directory_seeds WHERE seed_url = ? AND seed_title = ? AND '
+                                    'directory_url = ?',
+                                    [key[0] + (key[1], ) for key in self.requested if key not in self.found])
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+
+
+class EntityRecognizer(object):
+
+    # This class is intended to identify named entities (person names and organizations) in lists of
+    # short strings such as link titles, headings and PhD lines, which repeat across thousands of pages
+
+    # Strings are parsed in batch through the tagger and entity recognizer only, skipping the dependency
+    # parser, and the filtered result is kept in a process-wide LRU cache keyed by the normalized string
+    # and the filter mode
+
+    ENTITY_LABEL = {
+        'only_org': frozenset(['ORG']),
+        'including_org': frozenset(['PERSON', 'ORG']),
+        'person': frozenset(['PERSON'])
+    }
+    CACHE_SIZE = 50000
+    BATCH_SIZE = 256
+
+    def __init__(self, model_en, filter_keyword, cache_size=None):
+        self.model_en = model_en
+        self.filter_keyword = filter_keyword
+        self.cache_size = cache_size if cache_size is not None else self.CACHE_SIZE
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def parse_entity(self, target_string, mode='including_org'):
+        return self.parse_entity_list([target_string], mode=mode)[0]
+
+    def parse_entity_list(self, string_list, mode='including_org'):
+        # Get the entity dictionary of each string, parsing only the strings not seen before
+        string_normalized = [normalize_string_space(string) for string in string_list]
+        # Cache hits are copied into the result first, as inserting the parsed strings may evict them
+        result = {}
+        to_parse = []
+        for string in string_normalized:
+            if string in result or string in to_parse:
+                continue
+            if (string, mode) in self.cache:
+                self.cache.move_to_end((string, mode))
+                result[string] = self.cache[(string, mode)]
+                self.hits += 1
+            else:
+                to_parse.append(string)
+                self.misses += 1
+
+        docs = self.model_en.pipe(to_parse, tag=True, parse=False, entity=True, batch_size=self.BATCH_SIZE)
+        for string, doc in zip(to_parse, docs):
+            result[string] = self.filter_entity(doc.ents, mode)
+            self.cache[(string, mode)] = result[string]
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return [dict(result[string]) for string in string_normalized]
+
+    def filter_entity(self, entities, mode):
+        # Include ORG here as spacy is not capable of identifying all kinds of names
+        entity_dict = {normalize_string_space(entity.string): entity.label_ for entity in entities
+                       if entity.label_ in self.ENTITY_LABEL[mode]}
+        return {key: value for key, value in entity_dict.items()
+                if not contain_filter_word(key, self.filter_keyword)}
+
+    def get_stats(self):
+        # Report cache size and hit rate
+        total = self.hits + self.misses
+        return {
+            'size': len(self.cache),
+            'hit': self.hits,
+            'miss': self.misses,
+            'hit_rate': float(self.hits) / total if total > 0 else 0.0
+        }
+
+
+def normalize_string_space(string_before):
+    return ' '.join(string_before.split())
+
+
+def contain_filter_word(test_string, word_list):
+    for word in word_list:
+        if word in test_string.lower():
+            return True
+    return False
@@ -0,0 +1,66 @@
+import multiprocessing
+from collections import deque
+from twisted.internet import defer, reactor
+from twisted.python.failure import Failure
+
+
+class ExtractionExecutor(object):
+
+    # This class is intended to run CPU-bound extraction (spaCy named entity recognition and regex
+    # matching over profile text) outside of the reactor so that the downloader keeps working
+
+    # Work is submitted as a module-level function with picklable arguments and the result is returned
+    # as a Deferred fired in the reactor thread. The pool is forked when the spider is created, so each
+    # worker starts with the spaCy model already loaded by the parent process
+
+    # At most queue_size tasks are handed to the pool at once and at most waiting_limit more wait in submission
+    # order. The pending Deferreds keep their responses in the scraper slot, which in turn throttles the downloader
+    # Once the waiting queue is full a task is run inline in the reactor thread instead, which holds back the
+    # downloader until the workers catch up without dropping the task
+
+    def __init__(self, worker_count=2, queue_size=16, waiting_limit=64):
+        self.worker_count = worker_count
+        self.queue_size = max(queue_size, 1)
+        self.waiting_limit = max(waiting_limit, 0)
+        self.pool = multiprocessing.Pool(processes=worker_count) if worker_count > 0 else None
+        self.waiting = deque()
+        self.pending = 0
+        self.inline = 0
+
+    def submit(self, func, *args):
+        # Run the function inline when no worker is configured or too many tasks are waiting for one
+        if self.pool is None:
+            return defer.maybeDeferred(func, *args)
+        if self.pending >= self.queue_size and len(self.waiting) >= self.waiting_limit:
+            self.inline += 1
+            return defer.maybeDeferred(func, *args)
+
+        deferred = defer.Deferred()
+        if self.pending < self.queue_size:
+            self.dispatch(deferred, func, args)
+        else:
+            self.waiting.append((deferred, func, args))
+        return deferred
+
+    def dispatch(self, deferred, func, args):
+        # Hand the task to the pool, whose result handler thread passes the outcome back to the reactor
+        self.pending += 1
+        self.pool.apply_async(func, args,
+                              callback=lambda result: reactor.callFromThread(self.finish, deferred, result, None),
+                              error_callback=lambda error: reactor.callFromThread(self.finish, deferred, None, error))
+
+    def finish(self, deferred, result, error):
+        # Release the slot for the next waiting task before firing the Deferred
+        self.pending -= 1
+        if len(self.waiting) > 0:
+            self.dispatch(*self.waiting.popleft())
+
+        if error is not None:
+            deferred.errback(Failure(error))
+        else:
+            deferred.callback(result)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
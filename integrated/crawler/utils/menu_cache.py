@@ -0,0 +1,48 @@
+from collections import OrderedDict
+
+
+class MenuClassificationCache(object):
+
+    # This class is intended to remember how each menu entry of a site has been scored by the
+    # similarity navigator, as every page of a university site repeats the same navigation menu
+
+    # Entries are partitioned by netloc and keyed by the (normalized label, absolute href, ratio) triple,
+    # with both the number of sites and the number of entries per site bounded by LRU eviction
+
+    SITE_LIMIT = 256
+    ENTRY_LIMIT = 2048
+
+    def __init__(self, site_limit=None, entry_limit=None):
+        self.site_limit = site_limit if site_limit is not None else self.SITE_LIMIT
+        self.entry_limit = entry_limit if entry_limit is not None else self.ENTRY_LIMIT
+        self.sites = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, netloc, key):
+        # Return the stored similarity scores of the entry or None when it has not been scored yet
+        site = self.sites.get(netloc)
+        if site is None or key not in site:
+            self.misses += 1
+            return None
+
+        # Mark both the site and the entry as recently used
+        self.sites.move_to_end(netloc)
+        site.move_to_end(key)
+        self.hits += 1
+        return site[key]
+
+    def set(self, netloc, key, value):
+        # Store the similarity scores of the entry and evict the least recently used site or entry
+        site = self.sites.get(netloc)
+        if site is None:
+            site = self.sites[netloc] = OrderedDict()
+            if len(self.sites) > self.site_limit:
+                self.sites.popitem(last=False)
+        self.sites.move_to_end(netloc)
+        site[key] = value
+        if len(site) > self.entry_limit:
+            site.popitem(last=False)
+
+    def __len__(self):
+        return sum(len(site) for site in self.sites.values())
@@ -0,0 +1,97 @@
+import importlib
+import logging
+import os
+import threading
+import time
+
+
+class ModelRegistry(object):
+
+    # This class is intended to load every language model at most once per process and share it between the
+    # crawler and the benchmarker, as loading a spaCy model with vectors takes seconds
+
+    # spaCy models are keyed by package name and the pipeline components disabled by the caller, so callers
+    # asking for the same components share one instance
+    # gensim models are keyed by class and file and are loaded again when the file changes, memory-mapping
+    # their arrays by default so that processes can share them
+
+    # Models loaded under a group replace the model loaded before under the same group, such as the versions of
+    # a model saved again under a new file name
+
+    # Every load is timed and every request served from memory is counted to compare cold and warm latency
+
+    SPACY_COMPONENTS = frozenset(['tagger', 'parser', 'entity'])
+    GENSIM_MMAP = 'r'
+
+    def __init__(self):
+        self.models = {}
+        self.stats = {}
+        self.locks = {}
+        self.groups = {}
+        self.lock = threading.Lock()
+
+    def get_spacy_model(self, name, disable=()):
+        # Load the model package with the components given switched off, as with spacy.load(name, parser=False)
+        disable = tuple(sorted(set(disable)))
+        assert all(component in self.SPACY_COMPONENTS for component in disable)
+        return self.get(('spacy', name) + disable,
+                        lambda: importlib.import_module(name).load(**{component: False for component in disable}))
+
+    def get_gensim_model(self, model_class, path, mmap=GENSIM_MMAP, group=None):
+        # Load a saved gensim model, again if the file has been saved since it was loaded
+        key = ('gensim', model_class.__name__, path)
+        modified = os.path.getmtime(path)
+        with self.get_lock(key):
+            if key in self.models and self.stats[key]['modified'] != modified:
+                del self.models[key]
+        return self.get(key, lambda: model_class.load(path, mmap=mmap), modified=modified, group=group)
+
+    def get(self, key, load_func, modified=None, group=None):
+        # Return the model of the key, loading it with load_func the first time
+        # Callers asking while it is being loaded wait for that load instead of loading it again, while the models
+        # already loaded are served without waiting
+        model = self.models.get(key)
+        if model is None:
+            with self.get_lock(key):
+                model = self.models.get(key)
+                if model is None:
+                    start = time.time()
+                    model = load_func()
+                    load_time = time.time() - start
+                    logging.log(logging.INFO, 'Loaded model %s in %.2f seconds' % (' '.join(key), load_time))
+
+                    stats = self.stats.setdefault(key, {'model': ' '.join(key), 'loads': 0, 'hits': 0})
+                    stats['loads'] += 1
+                    stats['load_time'] = load_time
+                    stats['loaded_at'] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start))
+                    stats['modified'] = modified
+                    self.models[key] = model
+                    if group is not None:
+                        self.release(self.groups.get(group, key), key)
+                        self.groups[group] = key
+                    return model
+        # The statistics of a model released meanwhile are gone with it
+        stats = self.stats.get(key)
+        if stats is not None:
+            stats['hits'] += 1
+        return model
+
+    def release(self, key, keep):
+        # Drop the model of the key unless it is the one to keep, along with its statistics
+        with self.lock:
+            if key != keep:
+                self.models.pop(key, None)
+                self.stats.pop(key, None)
+                self.locks.pop(key, None)
+
+    def get_lock(self, key):
+        with self.lock:
+            return self.locks.setdefault(key, threading.Lock())
+
+    def get_stats(self):
+        # Report the last load time of every model along with how often it has been loaded and served warm
+        return [dict(stats, loaded=key in self.models) for key, stats in self.stats.items()]
+
+
+# Registry shared by everything running in the process
+MODEL_REGISTRY = ModelRegistry()
@@ -0,0 +1,73 @@
+class ProfileChangeLog(object):
+
+    # This class is intended to keep a log of the changes made to the profiles table, so that anything caching
+    # data derived from profiles can refresh only the profiles changed since the revision it was built at
+
+    # Every insert, delete and update of a tracked column is logged by triggers under a new revision, whether it
+    # is written by the crawler pipeline or edited in the web application, and the profile keeps the revision of
+    # its last change
+
+    TRACKED_COLUMNS = ['name', 'department', 'university', 'tag', 'position', 'phd_year', 'phd_school',
+                       'promotion_year', 'text_raw']
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_schema(self):
+        # Create the log and its triggers, adding the revision column to profiles created before
+        # Nothing is done until the profiles table has been created
+        profile_column = [row[1] for row in self.connection.execute('PRAGMA table_info(profiles)').fetchall()]
+        if len(profile_column) == 0:
+            return
+        if 'revision' not in profile_column:
+            self.connection.execute('ALTER TABLE profiles ADD COLUMN revision INTEGER')
+
+        self.connection.execute('CREATE TABLE IF NOT EXISTS profile_changes '
+                                '(revision INTEGER PRIMARY KEY AUTOINCREMENT, '
+                                'profile_link TEXT NOT NULL, '
+                                'change_type TEXT NOT NULL, '
+                                'changed_at TEXT NOT NULL)')
+
+        # Changes made in the web application are marked as edits by the user_updated flag set along with them
+        self.connection.execute('CREATE TRIGGER IF NOT EXISTS profiles_insert_change AFTER INSERT ON profiles '
+                                'BEGIN %s; %s; END' % (self.get_log_statement('NEW', "'insert'"),
+                                                       self.get_revision_statement()))
+        self.connection.execute('CREATE TRIGGER IF NOT EXISTS profiles_update_change AFTER UPDATE OF %s ON profiles '
+                                'WHEN %s '
+                                'BEGIN %s; %s; END' % (', '.join(self.TRACKED_COLUMNS),
+                                                       ' OR '.join('NEW.%s IS NOT OLD.%s' % (column, column)
+                                                                   for column in self.TRACKED_COLUMNS),
+                                                       self.get_log_statement(
+                                                           'NEW', "CASE WHEN NEW.user_updated = 1 "
+                                                                  "THEN 'edit' ELSE 'update' END"),
+                                                       self.get_revision_statement()))
+        self.connection.execute('CREATE TRIGGER IF NOT EXISTS profiles_delete_change AFTER DELETE ON profiles '
+                                'BEGIN %s; END' % self.get_log_statement('OLD', "'delete'"))
+        self.connection.commit()
+
+    def get_revision(self):
+        # Revision of the last change logged, or 0 before any change
+        revision = self.connection.execute('SELECT MAX(revision) FROM profile_changes').fetchone()[0]
+        return revision if revision is not None else 0
+
+    def get_changes_since(self, revision, limit=None):
+        # Get the last change of every profile changed after the revision, in the order of revision, along with
+        # the revision to ask from next time
+        # SQLite takes the other columns from the row with the maximum revision of each profile
+        query = ('SELECT MAX(revision), profile_link, change_type, changed_at FROM profile_changes '
+                 'WHERE revision > ? GROUP BY profile_link ORDER BY MAX(revision)')
+        rows = self.connection.execute(query + (' LIMIT %d' % limit if limit is not None else ''),
+                                       (revision, )).fetchall()
+        changes = [{'revision': row[0], 'profile_link': row[1], 'change_type': row[2], 'changed_at': row[3]}
+                   for row in rows]
+        return (changes[-1]['revision'] if len(changes) > 0 else revision), changes
+
+    @staticmethod
+    def get_log_statement(row, change_type):
+        return ("INSERT INTO profile_changes (profile_link, change_type, changed_at) "
+                "VALUES (%s.profile_link, %s, datetime('now', 'localtime'))" % (row, change_type))
+
+    @staticmethod
+    def get_revision_statement():
+        # The revision just logged by the trigger is the last row inserted
+        return 'UPDATE profiles SET revision = last_insert_rowid() WHERE profile_link = NEW.profile_link'
@@ -1,69 +1,67 @@
+import io
 import re
-from lxml import html
+from lxml import etree
+from PyPDF2 import PdfFileReader
+from crawler.utils.xpath_generic_extractor import get_extraction_context
 
 
-def get_key_information(response, debug=False):
+# Text groups are the list, paragraph, table row and span elements with text, and the div elements with text of
+# their own, whose text pieces are matched against the patterns below
+CLASS_FILTER_XPATH = '[not(self::nav) and (self::p or self::li or self::ol or self::dl or self::tr or self::span)]'
+GROUP_TEXT_XPATH = '//*[descendant-or-self::*[text()]]' + CLASS_FILTER_XPATH
+DIV_TEXT_XPATH = '//div[text()]'
 
-    def search_string_regex(target_string, regex, len_lim=20, is_filter=False, ignore_case=True):
-        if is_filter:
-            if ignore_case:
-                return re.search(regex, target_string.lower() if ignore_case else target_string, re.IGNORECASE)
-            else:
-                return re.search(regex, target_string.lower() if ignore_case else target_string)
+# Elements whose serialized HTML is not their escaped text, under which a text group is split by tags as markup
+RAW_MARKUP_XPATH = '//script | //style | //comment() | //processing-instruction()'
 
-        if len(target_string.split(' ')) > len_lim:
-            return False
-        else:
-            if ignore_case:
-                return re.search(regex, target_string.lower() if ignore_case else target_string, re.IGNORECASE)
-            else:
-                return re.search(regex, target_string.lower() if ignore_case else target_string)
+GROUP_PIECE_XPATH = etree.XPath('.//text()', smart_strings=False)
+DIV_PIECE_XPATH = etree.XPath('text()', smart_strings=False)
 
-    def search_sublist_regex(target_list, regex, len_lim=20, is_filter=False, ignore_case=True):
-        for sub_string in target_list:
-            if search_string_regex(sub_string, regex, len_lim, is_filter, ignore_case):
-                return True
-        return False
+TAG_REGEX = re.compile(r'\<[^>]*\>')
+PHD_REGEX = re.compile(r'(ph\.?[ ]?d\.?[ ]?)|(d\.?[ ]?phil\.?[ ]?)', re.IGNORECASE)
+PROF_REGEX = re.compile(r'professor', re.IGNORECASE)
+UNIVERSITY_DETECT_REGEX = re.compile(r'(?:university|institute|college|[A-Z][A-Z]{2,4})', re.IGNORECASE)
+UNIVERSITY_GET_REGEX = re.compile(r'(?:[ ]?([A-Za-z ]*(?:University|Institute|College})[A-Za-z ]*)[ ]?|[A-Z][A-Z]{2,4})')
+YEAR_REGEX = re.compile(r'(?:19|20)\d{2}')
+YEAR_HTML_REGEX = re.compile(r'\/(?:19|20)\d{2}\/')
+PUBLICATION_REGEX = re.compile(r'[A-Z][a-z]+(?:, |,| )[A-Z](?:\. |\.| ).*(?:19|20)\d{2}')
 
+# Strings longer than the word limit are left out of the year and school search
+GROUP_WORD_LIMIT = 20
+MAIN_CONTENT_WORD_LIMIT = 20
+
+
+def get_key_information(response, debug=False):
+    # Get the PhD year, PhD school and promotion year of a profile page, along with its main content
+    # The response or its extraction context is read through the parsed document in a single pass
+    return get_group_information(get_text_group(get_extraction_context(response)), debug=debug)
+
+
+def get_group_information(text_groups, debug=False):
+    # Get the key information from the text groups of a page, with every text group tested against all patterns
+    # in turn. The crawler collects the text groups of a page and runs this in the extraction executor
     phd_year_final = 'Unknown'
     phd_school_final = 'Unknown'
     promote_year_final = 'Unknown'
 
-    CLASS_FILTER_XPATH = '[not(self::nav) and (self::p or self::li or self::ol or self::dl or self::tr or self::span)]'
-    GROUP_TEXT_XPATH = '//*[descendant-or-self::*[text()]]' + CLASS_FILTER_XPATH
-    tag_regex = re.compile(r'\<[^>]*\>')
-    text_list_divided = list(map(lambda x: tag_regex.split(x), response.xpath(GROUP_TEXT_XPATH).extract()))
-    text_list_divided_filter = list(map(lambda sub_list: list(filter(lambda strings: len(strings.split()) > 0, sub_list)), text_list_divided))
-    text_list_divided_normalize_map = list(map(lambda sub_list: list(map(lambda strings: ' '.join(strings.split()), sub_list)), text_list_divided_filter))
-    text_list_pre_final = list(filter(lambda sub_list: len(sub_list) > 0, text_list_divided_normalize_map))
-
-    div_text = list(map(lambda html_str: html.fromstring(html_str).xpath('text()'), response.xpath('//div[text()]').extract()))
-    div_text_filter = list(map(lambda sub_list: list(filter(lambda strings: len(strings.split()) > 0, sub_list)), div_text))
-    div_normalize_map = list(map(lambda sub_list: list(map(lambda strings: ' '.join(strings.split()), sub_list)), div_text_filter))
-    div_final = list(filter(lambda sub_list: len(sub_list) > 0, div_normalize_map))
-    text_list_pre_final.extend(div_final)
-
-    phd_regex = r'(ph\.?[ ]?d\.?[ ]?)|(d\.?[ ]?phil\.?[ ]?)'
-    prof_regex = r'professor'
-    university_detect_regex = r'(?:university|institute|college|[A-Z][A-Z]{2,4})'
-    university_get_regex = r'(?:[ ]?([A-Za-z ]*(?:University|Institute|College})[A-Za-z ]*)[ ]?|[A-Z][A-Z]{2,4})'
-
-    year_regex = r'(?:19|20)\d{2}'
-    year_regex_html = r'\/(?:19|20)\d{2}\/'
-    publication_regex = r'[A-Z][a-z]+(?:, |,| )[A-Z](?:\. |\.| ).*(?:19|20)\d{2}'
-
-    phd_string = list(filter(lambda sub_list: search_sublist_regex(sub_list, phd_regex), text_list_pre_final))
-    phd_school = list(filter(lambda sub_list: search_sublist_regex(sub_list, university_detect_regex), phd_string))
-    phd_year = list(filter(lambda sub_list: search_sublist_regex(sub_list, year_regex) and not search_sublist_regex(sub_list, year_regex_html), phd_string))
-
-    prof_string = list(filter(lambda sub_list: search_sublist_regex(sub_list, prof_regex), text_list_pre_final))
-    prof_year = list(filter(lambda sub_list: search_sublist_regex(sub_list, year_regex) and not search_sublist_regex(sub_list, year_regex_html), prof_string))
-
-    main_content = list(filter(lambda sub_list: max(list(map(lambda x: len(x.split(' ')), sub_list))) >= 20, text_list_pre_final))
-    main_content = list(map(lambda sub_list: ' '.join(sub_list), main_content))
-    main_content = list(filter(lambda strings: not search_string_regex(strings, publication_regex, ignore_case=False, is_filter=True), main_content))
-    main_content = list(filter(lambda strings: not search_string_regex(strings, phd_regex, is_filter=True), main_content))
-    main_content = set(list(filter(lambda strings: len(strings.split(' ')) >= 20, main_content)))
+    phd_school = []
+    phd_year = []
+    prof_year = []
+    main_content = set()
+    for text_group in text_groups:
+        flag = get_text_group_flag(text_group)
+        if flag['PhD']:
+            if flag['University']:
+                phd_school.append(text_group)
+            if flag['Year']:
+                phd_year.append(text_group)
+        if flag['Professor'] and flag['Year']:
+            prof_year.append(text_group)
+        if flag['Length'] >= MAIN_CONTENT_WORD_LIMIT:
+            content = ' '.join(text_group)
+            if not PUBLICATION_REGEX.search(content) and not PHD_REGEX.search(content.lower()) and \
+                    len(content.split(' ')) >= MAIN_CONTENT_WORD_LIMIT:
+                main_content.add(content)
 
     phd_school_flatten = []
     phd_year_flatten = []
@@ -76,42 +74,42 @@ def get_key_information(response, debug=False):
 
             phd_school_flatten = [element for sub_list in phd_school for element in sub_list]
             phd_year_flatten = [element for sub_list in phd_year for element in sub_list]
-            phd_combined = list(filter(lambda x: search_string_regex(x, phd_regex, is_filter=True) and search_string_regex(x, university_get_regex, is_filter=True, ignore_case=False) and search_string_regex(x, year_regex, is_filter=True), phd_school_flatten + phd_year_flatten))
+            phd_combined = list(filter(lambda x: is_combined(x, PHD_REGEX), phd_school_flatten + phd_year_flatten))
             if len(phd_combined) > 0:
-                phd_school_final = re.findall(university_get_regex, phd_combined[0])[0]
-                phd_year_final = max(re.findall(year_regex, phd_combined[0]))
+                phd_school_final = UNIVERSITY_GET_REGEX.findall(phd_combined[0])[0]
+                phd_year_final = max(YEAR_REGEX.findall(phd_combined[0]))
             else:
                 phd_school_flatten = [', '.join(sub_list) for sub_list in phd_school]
                 phd_year_flatten = [', '.join(sub_list) for sub_list in phd_year]
-                phd_combined = list(filter(lambda x: search_string_regex(x, phd_regex, is_filter=True) and search_string_regex(x, university_get_regex, is_filter=True, ignore_case=False) and search_string_regex(x, year_regex, is_filter=True), phd_school_flatten + phd_year_flatten))
+                phd_combined = list(filter(lambda x: is_combined(x, PHD_REGEX), phd_school_flatten + phd_year_flatten))
                 if len(phd_combined) > 0:
-                    phd_school_final = re.findall(university_get_regex, phd_combined[0])[0]
-                    phd_year_final = max(re.findall(year_regex, phd_combined[0]))
+                    phd_school_final = UNIVERSITY_GET_REGEX.findall(phd_combined[0])[0]
+                    phd_year_final = max(YEAR_REGEX.findall(phd_combined[0]))
                 else:
                     phd_year_final = 'Unknown'
                     phd_school_flatten = [element for sub_list in phd_school for element in sub_list]
-                    phd_combined = list(filter(lambda x: search_string_regex(x, phd_regex, is_filter=True) and search_string_regex(x, university_get_regex, is_filter=True, ignore_case=False) and search_string_regex(x, year_regex, is_filter=True), phd_school_flatten))
+                    phd_combined = list(filter(lambda x: is_combined(x, PHD_REGEX), phd_school_flatten))
                     if len(phd_combined) > 0:
-                        phd_school_final = re.findall(university_get_regex, phd_combined[0])[0]
+                        phd_school_final = UNIVERSITY_GET_REGEX.findall(phd_combined[0])[0]
                     else:
                         phd_school_flatten = [', '.join(sub_list) for sub_list in phd_school]
-                        phd_combined = list(filter(lambda x: search_string_regex(x, phd_regex, is_filter=True) and search_string_regex(x, university_get_regex, is_filter=True, ignore_case=False) and search_string_regex(x, year_regex, is_filter=True), phd_school_flatten))
+                        phd_combined = list(filter(lambda x: is_combined(x, PHD_REGEX), phd_school_flatten))
                         if len(phd_combined) > 0:
-                            phd_school_final = re.findall(university_get_regex, phd_combined[0])[0]
+                            phd_school_final = UNIVERSITY_GET_REGEX.findall(phd_combined[0])[0]
     except IndexError:
         pass
 
     try:
         if len(prof_year) != 0:
             promote_year_flatten = [element for sub_list in prof_year for element in sub_list]
-            promote_combined = list(filter(lambda x: search_string_regex(x, prof_regex, is_filter=True) and search_string_regex(x, university_get_regex, is_filter=True, ignore_case=False) and search_string_regex(x, year_regex, is_filter=True), promote_year_flatten))
+            promote_combined = list(filter(lambda x: is_combined(x, PROF_REGEX), promote_year_flatten))
             if len(promote_combined) > 0:
-                promote_year_final = max(re.findall(year_regex, promote_combined[0]))
+                promote_year_final = max(YEAR_REGEX.findall(promote_combined[0]))
             else:
                 promote_year_flatten = [', '.join(sub_list) for sub_list in prof_year]
-                promote_combined = list(filter(lambda x: search_string_regex(x, prof_regex, is_filter=True) and search_string_regex(x, university_get_regex, is_filter=True, ignore_case=False) and search_string_regex(x, year_regex, is_filter=True), promote_year_flatten))
+                promote_combined = list(filter(lambda x: is_combined(x, PROF_REGEX), promote_year_flatten))
                 if len(promote_combined) > 0:
-                    promote_year_final = max(re.findall(year_regex, promote_combined[0]))
+                    promote_year_final = max(YEAR_REGEX.findall(promote_combined[0]))
                 else:
                     promote_year_final = 'Unknown'
     except IndexError:
@@ -134,3 +132,68 @@ def get_key_information(response, debug=False):
         }
 
     return phd_year_final, phd_school_final, promote_year_final, main_content
+
+
+def get_text_group(context):
+    # Generate the normalized, non-blank text pieces of every text group in the order of the page
+    # The pieces of a group are its text nodes escaped as in the serialized HTML, except for the groups holding
+    # raw markup, which are serialized and split by tags instead
+    raw_markup = set()
+    for node in context.select(RAW_MARKUP_XPATH):
+        raw_markup.add(node)
+        raw_markup.update(node.iterancestors())
+
+    for element in context.select(GROUP_TEXT_XPATH):
+        if element in raw_markup:
+            pieces = TAG_REGEX.split(etree.tostring(element, method='html', encoding='unicode', with_tail=False))
+        else:
+            pieces = [escape_text(text) for text in GROUP_PIECE_XPATH(element)]
+        text_group = [' '.join(piece.split()) for piece in pieces if len(piece.split()) > 0]
+        if len(text_group) > 0:
+            yield text_group
+
+    for element in context.select(DIV_TEXT_XPATH):
+        text_group = [' '.join(text.split()) for text in DIV_PIECE_XPATH(element) if len(text.split()) > 0]
+        if len(text_group) > 0:
+            yield text_group
+
+
+def get_text_group_flag(text_group):
+    # Test every pattern against the strings of the text group within the word limit in one scan
+    flag = {'PhD': False, 'University': False, 'Professor': False, 'Year': False, 'Length': 0}
+    year_html = False
+    for text in text_group:
+        length = len(text.split(' '))
+        flag['Length'] = max(flag['Length'], length)
+        if length > GROUP_WORD_LIMIT:
+            continue
+        text = text.lower()
+        flag['PhD'] = flag['PhD'] or PHD_REGEX.search(text) is not None
+        flag['University'] = flag['University'] or UNIVERSITY_DETECT_REGEX.search(text) is not None
+        flag['Professor'] = flag['Professor'] or PROF_REGEX.search(text) is not None
+        flag['Year'] = flag['Year'] or YEAR_REGEX.search(text) is not None
+        year_html = year_html or YEAR_HTML_REGEX.search(text) is not None
+    # A year only counts when no string of the group has it as part of a link path
+    flag['Year'] = flag['Year'] and not year_html
+    return flag
+
+
+def is_combined(text, degree_regex):
+    # Whether the string has the degree or position, a university name and a year all together
+    return degree_regex.search(text.lower()) and UNIVERSITY_GET_REGEX.search(text) and YEAR_REGEX.search(text)
+
+
+def escape_text(text):
+    # Escape a text node the way it is written in the serialized HTML
+    if '&' in text or '<' in text or '>' in text:
+        return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return text
+
+
+def get_resume_text(pdf_body):
+    # Extract word tokens from the body of a resume in PDF, intended to be run in an extraction worker
+    reader = PdfFileReader(io.BytesIO(pdf_body))
+    text_content_list = []
+    for page_number in range(reader.getNumPages()):
+        text_content_list.extend(reader.getPage(page_number).extractText().split())
+    return text_content_list
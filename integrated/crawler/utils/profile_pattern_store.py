@@ -0,0 +1,75 @@
+import json
+import sqlite3
+from collections import OrderedDict
+
+
+class ProfilePatternStore(object):
+
+    # This class is intended to keep track of the profile pages found under each original start (the pair of
+    # department URL and title) and the link pattern compiled from them once the profile threshold is reached
+
+    # Compiled patterns are saved in SQLite so that later crawls filter links by them from the first request
+    # The records in memory are bounded by LRU eviction, and an evicted record is restored from SQLite with
+    # its compiled pattern when the original start is visited again
+
+    MEMORY_LIMIT = 4096
+
+    def __init__(self, database_path, threshold, memory_limit=None):
+        self.threshold = threshold
+        self.memory_limit = memory_limit if memory_limit is not None else self.MEMORY_LIMIT
+        self.records = OrderedDict()
+
+        self.connection = sqlite3.connect(database_path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS profile_patterns '
+                                '(start_url TEXT NOT NULL, '
+                                'title TEXT, '
+                                'netloc TEXT NOT NULL, '
+                                'path TEXT NOT NULL, '
+                                'PRIMARY KEY (start_url, title))')
+        self.connection.commit()
+
+        # Load the most recently compiled patterns up to the memory limit
+        rows = self.connection.execute('SELECT start_url, title, netloc, path FROM profile_patterns '
+                                       'ORDER BY rowid DESC LIMIT ?', (self.memory_limit, )).fetchall()
+        for start_url, title, netloc, path in reversed(rows):
+            self.records[(start_url, title)] = self.create_record(self.parse_compiled(netloc, path))
+
+    def get(self, original_start):
+        # Get the record of the original start, creating it or restoring it from SQLite when not in memory
+        record = self.records.get(original_start)
+        if record is not None:
+            self.records.move_to_end(original_start)
+            return record
+
+        row = self.connection.execute('SELECT netloc, path FROM profile_patterns WHERE start_url = ? AND title = ?',
+                                      original_start).fetchone()
+        record = self.create_record(self.parse_compiled(*row) if row is not None else None)
+        self.records[original_start] = record
+        if len(self.records) > self.memory_limit:
+            self.records.popitem(last=False)
+        return record
+
+    def set_compiled(self, original_start, compiled):
+        # Attach the compiled pattern to the record and save it for later crawls
+        self.get(original_start)['Compiled'] = compiled
+        self.connection.execute('INSERT OR REPLACE INTO profile_patterns (start_url, title, netloc, path) '
+                                'VALUES (?, ?, ?, ?)',
+                                tuple(original_start) + (json.dumps(list(compiled['Netloc'])),
+                                                         json.dumps(sorted(compiled['Path']))))
+        self.connection.commit()
+
+    def create_record(self, compiled=None):
+        # A record with a compiled pattern starts at the threshold so that links are filtered right away
+        if compiled is None:
+            return {'Total': 0, 'Pattern': []}
+        return {'Total': self.threshold, 'Pattern': [], 'Compiled': compiled}
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return len(self.records)
+
+    @staticmethod
+    def parse_compiled(netloc, path):
+        return {'Netloc': json.loads(netloc), 'Path': set(json.loads(path))}
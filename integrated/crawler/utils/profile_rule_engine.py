@@ -0,0 +1,90 @@
+import re
+
+
+class ProfileRuleEngine(object):
+
+    # This class is intended to evaluate the position and year information rules over the main text of a profile
+    # page, or the word tokens of a resume, in one pass over its lines
+
+    # Every line is lowercased, counted and tested against all compiled rules once, keeping the indices of the
+    # matching lines and the first position of every line, so that the lines around a match are found in
+    # constant time instead of searching the text for it again
+
+    ASSOCIATE_PROFESSOR_REGEX = re.compile(r'(associate|(assoc\.?)) prof[\.]?[ ]?')
+    ASSISTANT_PROFESSOR_REGEX = re.compile(r'(assistant|(asst\.?)) prof[\.]?[ ]?')
+    PROFESSOR_REGEX = re.compile(r'prof\.|professor')
+    PHD_REGEX = re.compile(r'(ph\.?[ ]?d\.?[ ]?)|(d\.?[ ]?phil\.?[ ]?)')
+    YEAR_REGEX = re.compile(r'(?:19|20)\d{2}')
+
+    RULES = ['Associate Professor', 'Assistant Professor', 'Professor', 'Professor Word', 'PhD', 'Student']
+
+    def __init__(self, main_text):
+        self.main_text = list(main_text)
+        self.word_count = []
+        self.year = []
+        self.first_index = {}
+        self.matched = {rule: [] for rule in self.RULES}
+
+        for index, line in enumerate(self.main_text):
+            self.first_index.setdefault(line, index)
+            self.word_count.append(len(line.split(' ')))
+            self.year.append(self.YEAR_REGEX.findall(line))
+
+            # Every professor rule needs 'prof' and every PhD rule needs 'ph' in the line
+            line = line.lower()
+            if 'prof' in line:
+                if self.ASSOCIATE_PROFESSOR_REGEX.search(line):
+                    self.matched['Associate Professor'].append(index)
+                if self.ASSISTANT_PROFESSOR_REGEX.search(line):
+                    self.matched['Assistant Professor'].append(index)
+                if self.PROFESSOR_REGEX.search(line):
+                    self.matched['Professor'].append(index)
+                if 'professor' in line:
+                    self.matched['Professor Word'].append(index)
+            if 'ph' in line and self.PHD_REGEX.search(line):
+                self.matched['PhD'].append(index)
+            if 'student' in line:
+                self.matched['Student'].append(index)
+
+        self.student = set(self.matched['Student'])
+
+    def select(self, rule, len_lim, exclude_student=False):
+        # Indices of the lines matching the rule within the word limit, in the order of the text
+        return [index for index in self.matched[rule] if self.word_count[index] <= len_lim and
+                not (exclude_student and index in self.student)]
+
+    def get_position(self, len_lim):
+        # Position found in the main text, with assistant over associate professor and professor over both
+        # when a line reads professor alone or a line mentions a professor without being either of them
+        position = 'Non-Professor'
+        if len(self.select('Associate Professor', len_lim)) > 0:
+            position = 'Associate Professor'
+        if len(self.select('Assistant Professor', len_lim)) > 0:
+            position = 'Assistant Professor'
+
+        excluded = set(self.matched['Associate Professor'] + self.matched['Assistant Professor'])
+        if len(self.select('Professor Word', 1)) > 0:
+            position = 'Professor'
+        elif len([index for index in self.select('Professor', len_lim) if index not in excluded]) > 0:
+            position = 'Professor'
+        return position
+
+    def get_neighbors(self, index_list):
+        # Indices of the lines given along with the lines right before and after them, each line kept once
+        # in the order found and located at its first position in the text
+        neighbors = []
+        seen = set()
+        for index in index_list:
+            position = self.first_index[self.main_text[index]]
+            for neighbor in [position - 1, position, position + 1]:
+                if 0 <= neighbor < len(self.main_text) and self.main_text[neighbor] not in seen:
+                    seen.add(self.main_text[neighbor])
+                    neighbors.append(self.first_index[self.main_text[neighbor]])
+        return neighbors
+
+    def get_year(self, index_list):
+        # Years found in each of the lines given, leaving out lines about students and lines without a year
+        return [self.year[index] for index in index_list if len(self.year[index]) > 0 and index not in self.student]
+
+    def get_text(self, index_list):
+        return [self.main_text[index] for index in index_list]
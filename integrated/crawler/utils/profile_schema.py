@@ -0,0 +1,63 @@
+import re
+from crawler.utils.profile_change_log import ProfileChangeLog
+
+
+# Columns added to the profiles table since it was first created, with their types
+PROFILE_COLUMNS = [('content_hash', 'TEXT'), ('last_seen', 'TEXT'), ('phd_year_int', 'INTEGER'),
+                   ('promotion_year_int', 'INTEGER'), ('phd_school_rank', 'INTEGER'), ('research_sentences', 'TEXT'),
+                   ('research_keywords', 'TEXT'), ('research_vector', 'BLOB'), ('keyword_vectors', 'BLOB')]
+
+# Typed copies of the year columns for numeric filters in SQLite, where NULL means the year is unknown
+YEAR_COLUMNS = {'phd_year': 'phd_year_int', 'promotion_year': 'promotion_year_int'}
+
+# Research area embedded at ingest by the benchmarker, cleared whenever text_raw changes
+# Sentences and keywords are JSON lists and vectors are float32 arrays
+RESEARCH_COLUMNS = ['research_sentences', 'research_keywords', 'research_vector', 'keyword_vectors']
+
+# Indexes for the filters of the web application and the benchmarker, which always restrict to a department
+PROFILE_INDEXES = [('profiles_department_position_tag', ['department', 'position', 'tag']),
+                   ('profiles_department_university', ['department', 'university']),
+                   ('profiles_department_tag_university', ['department', 'tag', 'university'])]
+
+# Ranks of the schools resolved by the benchmarker against a version of the university rank table
+SCHOOL_RANKS_TABLE = ('CREATE TABLE IF NOT EXISTS school_ranks (school TEXT NOT NULL, table_version TEXT NOT NULL, '
+                      'matched_name TEXT, rank INTEGER, score INTEGER, PRIMARY KEY (school, table_version))')
+
+YEAR_REGEX = re.compile(r'^(?:19|20)\d{2}$')
+
+
+def migrate_profiles(connection):
+    # Bring a profiles table created before up to date, adding the columns, typed years, indexes and the change log
+    # Nothing is done until the profiles table has been created
+    profile_column = [row[1] for row in connection.execute('PRAGMA table_info(profiles)').fetchall()]
+    if len(profile_column) == 0:
+        return
+
+    for column, column_type in PROFILE_COLUMNS:
+        if column not in profile_column:
+            connection.execute('ALTER TABLE profiles ADD COLUMN %s %s' % (column, column_type))
+
+    # Fill in the typed years of the profiles written before the columns were added
+    for column, year_column in YEAR_COLUMNS.items():
+        if year_column not in profile_column:
+            connection.execute("UPDATE profiles SET %s = CAST(trim(%s) AS INTEGER) "
+                               "WHERE trim(%s) GLOB '19[0-9][0-9]' OR trim(%s) GLOB '20[0-9][0-9]'" %
+                               (year_column, column, column, column))
+
+    for index_name, index_column in PROFILE_INDEXES:
+        connection.execute('CREATE INDEX IF NOT EXISTS %s ON profiles (%s)' % (index_name, ', '.join(index_column)))
+    connection.commit()
+
+    ProfileChangeLog(connection).create_schema()
+
+
+def migrate_school_ranks(connection):
+    # Add the table of resolved school ranks to databases created before
+    connection.execute(SCHOOL_RANKS_TABLE)
+    connection.commit()
+
+
+def parse_year(year):
+    # Get the year as an integer, or None if it is unknown
+    year = str(year).strip()
+    return int(year) if YEAR_REGEX.match(year) else None
@@ -1,7 +1,9 @@
-import en_core_web_md
 import logging
+import numpy
 import re
 from difflib import SequenceMatcher
+from scrapy.utils.url import parse_url
+from .model_registry import MODEL_REGISTRY
 from .xpath_generic_extractor import get_menu, get_general
 
 
@@ -32,10 +34,59 @@ class SimilarityNavigator(object):
     LINK_FILTER_KEYWORD_CHAR_WISE = frozenset(['login', 'logout', 'publication', 'news', 'wiki',
                                                'event', 'calendar', 'map', 'article', 'blog', 'student'])
 
+    # The full pipeline is kept as the entity recognizer of the spider shares the model
+    MODEL_NAME = 'en_core_web_md'
+
     def __init__(self):
-        self.model_en = en_core_web_md.load()
+        self.model_en = MODEL_REGISTRY.get_spacy_model(self.MODEL_NAME)
+
+        # Pre-compute the vectors of every target phrase once so that each page only has to parse its own menu
+        # Keep the iteration order of the class attributes so that ties are broken as before
+        self.target_index = [(target_class, target_word)
+                             for target_class, target_words in [('DEPARTMENT', list(self.DEPARTMENT_TARGET)),
+                                                                ('PEOPLE', list(self.PEOPLE_TARGET))]
+                             for target_word in target_words]
+        self.target_matrix = self.get_vector_matrix([self.model_en(target_word.lower())
+                                                     for _, target_word in self.target_index])
+
+    def get_content(self, menu, similarity, target_class, top=3):
+        # Attach the similarity of each menu item against the target keyword
+        menu_with_similarity = [item_pair + [float(score), target_class] for item_pair, score in zip(menu, similarity)]
+
+        # Return the sorted list and by default the top three content
+        return sorted(menu_with_similarity, key=lambda x: x[2], reverse=True)[:top]
+
+    def get_similarity_matrix(self, response, menu, ratio=0.8, cache=None):
+        # Score every menu item against every target keyword, in the shape of (item, target)
+        # Strip if there is index indicating redundancy
+        netloc = parse_url(response.url).netloc
+        string_stripped = [re.sub(r'\([1-9]+\)', '', item_pair[0]) for item_pair in menu]
+        # The ratio weighs the cached scores, so it is part of the key along with the item
+        cache_key = [(string.lower(), item_pair[1], ratio) for string, item_pair in zip(string_stripped, menu)]
+
+        # Reuse the scores of menu items that have been seen on the same site
+        matrix = numpy.zeros((len(menu), len(self.target_index)), dtype='float64')
+        to_score = []
+        for row, key in enumerate(cache_key):
+            cached = cache.get(netloc, key) if cache is not None else None
+            if cached is None:
+                to_score.append(row)
+            else:
+                matrix[row] = cached
+
+        # Score the remaining items in one batch
+        if len(to_score) > 0:
+            semantic_matrix = self.get_semantic_similarity([string_stripped[row] for row in to_score])
+            for row, semantic_row in zip(to_score, semantic_matrix):
+                matrix[row] = [self.get_similarity(first_string=string_stripped[row], second_string=target_word,
+                                                   ratio=ratio, semantic=semantic)[0]
+                               for (_, target_word), semantic in zip(self.target_index, semantic_row)]
+                if cache is not None:
+                    cache.set(netloc, cache_key[row], matrix[row].copy())
 
-    def get_content(self, response, target, target_class, extract_func, ratio=0.8, top=3):
+        return matrix
+
+    def get_menu_content(self, response, extract_func):
 
         def normalize_word(target_string):
             if target_string.lower() not in self.model_en.vocab:
@@ -46,39 +97,43 @@ class SimilarityNavigator(object):
                 return target_string
 
         # Use the extraction inherited from crawler.xpath_generic_extractor
-        menu = [[normalize_word(key), value] for key, value in extract_func(response).items()]
-        menu_with_similarity = []
-
-        # Iterate through each item pair and obtain the similarity with the target keyword
-        for item_pair in menu:
-            # Strip if there is index indicating redundancy
-            string_stripped = re.sub(r'\([1-9]+\)', '', item_pair[0])
-            menu_with_similarity.append(item_pair + self.get_similarity(first_string=string_stripped,
-                                                                        second_string=target,
-                                                                        ratio=ratio) + [target_class])
-
-        # Return the sorted list and by default the top three content
-        return sorted(menu_with_similarity, key=lambda x: x[2], reverse=True)[:top]
+        return [[normalize_word(key), value] for key, value in extract_func(response).items()]
 
-    def get_similarity(self, first_string, second_string, ratio=0.8):
+    def get_similarity(self, first_string, second_string, ratio=0.8, semantic=None):
         # Get the similarities between two strings and weigh by the given ratio
-        # Get the semantic similarity between two string
-        first_string_nlp = self.model_en(first_string.lower())
-        second_string_nlp = self.model_en(second_string.lower())
-
         # Get the sequential similarity between two strings, i.e. how many characters are shared
         s = SequenceMatcher(None, first_string.lower(), second_string.lower())
         if s.ratio() >= self.SEQUENTIAL_THRESHOLD:
             # If the sequence similarity is extremely high, stop before calculating semantic similarity
             return [s.ratio()]
 
+        # Get the semantic similarity between two string unless it has been computed in batch
+        if semantic is None:
+            semantic = self.model_en(first_string.lower()).similarity(self.model_en(second_string.lower()))
+
         # Output a weighted similarity metric by the given ratio
-        return [first_string_nlp.similarity(second_string_nlp) * ratio + s.ratio() * (1 - ratio)]
+        return [semantic * ratio + s.ratio() * (1 - ratio)]
+
+    def get_semantic_similarity(self, string_list):
+        # Parse all strings in one batch and get the cosine similarity against every target phrase
+        # through a single matrix product, in the shape of (string, target)
+        # Only tokenization is needed for the document vectors
+        docs = self.model_en.pipe([string.lower() for string in string_list], tag=False, parse=False, entity=False)
+        return self.get_vector_matrix(list(docs)).dot(self.target_matrix.T)
+
+    def get_vector_matrix(self, docs):
+        # Stack the document vectors scaled to unit length, leaving zero vectors for empty or unknown documents
+        # so that their similarity is zero as in Doc.similarity
+        matrix = numpy.zeros((len(docs), self.model_en.vocab.vectors_length), dtype='float64')
+        for row, doc in enumerate(docs):
+            if doc.vector_norm != 0:
+                matrix[row] = doc.vector / doc.vector_norm
+        return matrix
 
     def get_target_content(self, response,
                            parse_only_people=False, parse_only_department=False,
                            fall_back_to_general=True, extract_func=get_menu,
-                           ratio=0.8, top_from_each=3, threshold=0.7):
+                           ratio=0.8, top_from_each=3, threshold=0.7, cache=None):
         # Iterate through the target lists and get the most similar contents
         combined_list = {
             'DEPARTMENT': list(self.DEPARTMENT_TARGET),
@@ -89,14 +144,16 @@ class SimilarityNavigator(object):
         if parse_only_people:
             del combined_list['DEPARTMENT']
 
+        # Extract and score the menu only once for all target words
+        menu = self.get_menu_content(response, extract_func)
+        similarity_matrix = self.get_similarity_matrix(response, menu, ratio=ratio, cache=cache)
+
         target_list = []
-        for target_class, target_words in combined_list.items():
-            for target_word in target_words:
-                target_list += self.get_content(response=response,
-                                                target=target_word, target_class=target_class,
-                                                extract_func=extract_func,
-                                                ratio=ratio,
-                                                top=top_from_each)
+        for target_column, (target_class, target_word) in enumerate(self.target_index):
+            if target_class not in combined_list.keys():
+                continue
+            target_list += self.get_content(menu=menu, similarity=similarity_matrix[:, target_column],
+                                            target_class=target_class, top=top_from_each)
 
         # Output the sorted target list within the specified threshold
         sorted_list = sorted(target_list, key=lambda x: x[2], reverse=True)
@@ -121,7 +178,8 @@ class SimilarityNavigator(object):
                                                parse_only_people=parse_only_people,
                                                parse_only_department=parse_only_department,
                                                fall_back_to_general=False, extract_func=get_general,
-                                               ratio=ratio, top_from_each=top_from_each, threshold=threshold)
+                                               ratio=ratio, top_from_each=top_from_each, threshold=threshold,
+                                               cache=cache)
 
         return result_list
 
@@ -1,4 +1,8 @@
+import copy
+import functools
+import hashlib
 import re
+from lxml import etree
 from scrapy.http import Response
 from scrapy.linkextractors import IGNORED_EXTENSIONS
 from scrapy.utils.url import parse_url
@@ -75,15 +79,88 @@ MENU_TEXT_FILTER = frozenset(['calendar', 'curriculum', 'event', 'news', 'resour
 MENU_TOKEN_FILTER = frozenset(['hide', 'main', 'menu', 'more', 'show', 'skip', 'back', 'top', 'to'])
 FILE_EXTENSION = IGNORED_EXTENSIONS + ['htm', 'html']
 
+# Compile the XPath expressions above once, with other expressions compiled and kept on first use
+TITLE_TEXT_XPATH = '//title/text()'
+GENERAL_XPATH = '//a[@href[not(contains(., "#"))]]'
+GENERAL_HREF_XPATH = '//a[@href]/@href[not(contains(., "#"))]'
+COMPILED_XPATH = {xpath: etree.XPath(xpath, smart_strings=False)
+                  for xpath in [MAIN_CONTENT_XPATH, MAIN_CONTENT_HREF_XPATH, HEADER_XPATH, HEADER_HREF_XPATH,
+                                MENU_XPATH, MENU_HREF_XPATH, MAIN_CONTENT_NO_MENU_XPATH,
+                                MAIN_CONTENT_NO_MENU_HREF_XPATH, TEXT_XPATH, TITLE_XPATH, H1_XPATH, H2_XPATH,
+                                H3_XPATH, MAIN_CONTENT_TEXT_XPATH_RAW, MAIN_CONTENT_TEXT_XPATH, TITLE_TEXT_XPATH,
+                                GENERAL_XPATH, GENERAL_HREF_XPATH]}
+
+
+class ExtractionContext(object):
+
+    # Extraction state of a single response, passed through the spider callbacks in place of the response
+    # The document is parsed once by scrapy, and every XPath result and extraction below is evaluated
+    # on first use only
+
+    def __init__(self, response):
+        self.response = response
+        self.url = response.url
+        self.root = response.selector.root
+        self.selected = {}
+        self.selected_text = {}
+        self.memo = {}
+
+    @property
+    def meta(self):
+        return self.response.meta
+
+    def urljoin(self, url):
+        return self.response.urljoin(url)
+
+    def select(self, xpath):
+        # Evaluate the XPath expression against the document
+        if xpath not in self.selected:
+            self.selected[xpath] = get_compiled_xpath(xpath)(self.root)
+        return self.selected[xpath]
+
+    def select_text(self, xpath):
+        # Get the text of each element selected by the XPath expression
+        if xpath not in self.selected_text:
+            text_xpath = COMPILED_XPATH[TEXT_XPATH]
+            self.selected_text[xpath] = [text_xpath(element) for element in self.select(xpath)]
+        return self.selected_text[xpath]
+
+    def __repr__(self):
+        return repr(self.response)
+
+
+def get_extraction_context(response):
+    # Create the extraction context of the response unless it is given already
+    if isinstance(response, ExtractionContext):
+        return response
+    return ExtractionContext(response)
+
+
+def get_compiled_xpath(xpath):
+    if xpath not in COMPILED_XPATH:
+        COMPILED_XPATH[xpath] = etree.XPath(xpath, smart_strings=False)
+    return COMPILED_XPATH[xpath]
+
+
+def memoize_extraction(extract_func):
+    # Run the extraction once per context and return a copy of the result to the caller
+    @functools.wraps(extract_func)
+    def memoized(response):
+        context = get_extraction_context(response)
+        if extract_func.__name__ not in context.memo:
+            context.memo[extract_func.__name__] = extract_func(context)
+        return copy.copy(context.memo[extract_func.__name__])
+    return memoized
+
 
 # Generic functions
 
 def generic_get_anchor_and_text(response, content_xpath, href_xpath):
     # Get content text list, normalize and concatenate
-    content = response.xpath(content_xpath)
-    content_text = map(lambda html_string: ' '.join(html_string.xpath(TEXT_XPATH).extract()), content)
-    content_text = list(map(lambda text: ' '.join(text.split()), list(content_text)))
-    href = list(map(lambda each_string: normalize_string(each_string), response.xpath(href_xpath).extract()))
+    context = get_extraction_context(response)
+    content_text = list(map(lambda text_list: ' '.join(' '.join(text_list).split()),
+                            context.select_text(content_xpath)))
+    href = list(map(lambda each_string: normalize_string(each_string), context.select(href_xpath)))
     text_freq_dict = {}
 
     # Avoid redundancy
@@ -99,36 +176,19 @@ def generic_get_anchor_and_text(response, content_xpath, href_xpath):
             text_freq_dict[text_ele] = 1
 
     # Zip text and href
-    text_link_dict = {text: response.urljoin(link) for text, link in zip(content_text, href)}
+    text_link_dict = {text: context.urljoin(link) for text, link in zip(content_text, href)}
     return text_link_dict
 
 
 def generic_get_unique_content(response, past_response, extract_func=None, get_text=False):
     # Get unique content by comparing with previous response
-    # Deal with list or a single Response object
-    def normalize_link(link_url):
-        # TreatURL with slash at the end as the same as those without a slash
-        if link_url[-1] == '/':
-            return link_url[:-1]
-        else:
-            return link_url
-
-    if isinstance(past_response, Response):
-        if not get_text:
-            general_past_content = get_general(past_response)
-        else:
-            general_past_content = past_response.xpath(MAIN_CONTENT_TEXT_XPATH_RAW).extract()
+    # Deal with list or a single Response/ExtractionContext/ResponseFingerprint object
+    if isinstance(past_response, (Response, ExtractionContext, ResponseFingerprint)):
+        past_fingerprint = [get_response_fingerprint(past_response)]
     elif type(past_response) is list:
-        # Changed to get_general
-        if not get_text:
-            general_past_content = {key: value
-                                    for element in past_response
-                                    for key, value in get_general(element).items()}
-        else:
-            general_past_content = [value for element in past_response
-                                    for value in element.xpath(MAIN_CONTENT_TEXT_XPATH_RAW).extract()]
+        past_fingerprint = [get_response_fingerprint(element) for element in past_response]
     else:
-        general_past_content = {}
+        past_fingerprint = []
 
     if not get_text:
         # Return unique content
@@ -136,23 +196,56 @@ def generic_get_unique_content(response, past_response, extract_func=None, get_t
         response_content = extract_func(response)
         if len(response_content) <= 0:
             response_content = get_general(response)
-        link_values = list(map(lambda link: normalize_link(link), list(general_past_content.values())))
         content = {text: link for text, link in response_content.items()
-                   if (normalize_link(link) not in link_values) & (text not in general_past_content.keys())}
+                   if not any(fingerprint.contain_link(link) or fingerprint.contain_anchor_text(text)
+                              for fingerprint in past_fingerprint)}
         if (len(content) == 0) & (extract_func != get_general):
-            return generic_get_unique_content(response, past_response, get_general)
+            return generic_get_unique_content(response, past_fingerprint, get_general)
         else:
             return content
     else:
-        text_content = response.xpath(MAIN_CONTENT_TEXT_XPATH_RAW).extract()
+        text_content = get_main_content_text_raw(response)
         text_content_normalized = list(filter(lambda y: len(y) >= 3, map(lambda x: ' '.join(x.split()), text_content)))
-        content = set(general_past_content)
         return [text_element for text_element in text_content_normalized
-                if text_element not in content]
+                if not any(fingerprint.contain_text(text_element) for fingerprint in past_fingerprint)]
+
+
+class ResponseFingerprint(object):
+
+    # Compact record of a response passed down to deeper requests in place of the response itself
+    # Only the url, the title and hashes of the anchor text, links and raw text are kept, which are
+    # all that is needed to tell the unique content of a child page
+
+    __slots__ = ('url', 'title', 'anchor_text', 'link', 'text')
+
+    def __init__(self, response):
+        general_content = get_general(response)
+        self.url = response.url
+        self.title = get_page_title(response)
+        self.anchor_text = frozenset(map(hash_string, general_content.keys()))
+        self.link = frozenset(map(lambda link: hash_string(normalize_link(link)), general_content.values()))
+        self.text = frozenset(map(hash_string, get_main_content_text_raw(response)))
+
+    def contain_anchor_text(self, text):
+        return hash_string(text) in self.anchor_text
+
+    def contain_link(self, link):
+        return hash_string(normalize_link(link)) in self.link
+
+    def contain_text(self, text):
+        return hash_string(text) in self.text
+
+
+def get_response_fingerprint(response):
+    # Fingerprint the response unless it has been done
+    if isinstance(response, ResponseFingerprint):
+        return response
+    return ResponseFingerprint(response)
 
 
 # Specific get functions
 
+@memoize_extraction
 def get_main_content(response):
     # Main content can include secondary menu
     return generic_get_anchor_and_text(response=response,
@@ -165,6 +258,7 @@ def get_main_content_unique(response, past_response):
     return generic_get_unique_content(response, past_response, get_general)
 
 
+@memoize_extraction
 def get_main_content_excluding_menu(response):
     # Rewrite main content with menu content as main content can include secondary menu
     # Delete secondary menu here
@@ -174,9 +268,10 @@ def get_main_content_excluding_menu(response):
             | (link not in menu_content.values())}
 
 
+@memoize_extraction
 def get_main_content_text(response):
     # Get main content text
-    text_content = response.xpath(MAIN_CONTENT_TEXT_XPATH).extract()
+    text_content = get_extraction_context(response).select(MAIN_CONTENT_TEXT_XPATH)
     menu_content = get_menu(response)
 
     # Double-check there is no menu component
@@ -184,6 +279,28 @@ def get_main_content_text(response):
     return list(filter(lambda y: len(y) > 3, map(lambda x: ' '.join(x.split()), text_content)))
 
 
+@memoize_extraction
+def get_main_content_text_raw(response):
+    # Get all text of the page without normalization
+    return get_extraction_context(response).select(MAIN_CONTENT_TEXT_XPATH_RAW)
+
+
+@memoize_extraction
+def get_page_title(response):
+    # Get the text of the title tag or None if there is not any
+    title = get_extraction_context(response).select(TITLE_TEXT_XPATH)
+    return title[0] if len(title) > 0 else None
+
+
+@memoize_extraction
+def get_content_hash(response):
+    # Hash of the main text of the page excluding header, footer and menu, which carry banners and dates
+    # changing independently of the profile, so that it does not depend on the page it has been reached from
+    text_content = [' '.join(text.split()) for text in get_extraction_context(response).select(MAIN_CONTENT_TEXT_XPATH)]
+    return hashlib.md5('\n'.join(text_content).encode('utf-8')).hexdigest()
+
+
+@memoize_extraction
 def get_header(response):
     # Get header content
     return generic_get_anchor_and_text(response=response,
@@ -191,13 +308,15 @@ def get_header(response):
                                        href_xpath=HEADER_HREF_XPATH)
 
 
+@memoize_extraction
 def get_general(response):
     # Get all anchor object for current response
     return generic_get_anchor_and_text(response=response,
-                                       content_xpath='//a[@href[not(contains(., "#"))]]',
-                                       href_xpath='//a[@href]/@href[not(contains(., "#"))]')
+                                       content_xpath=GENERAL_XPATH,
+                                       href_xpath=GENERAL_HREF_XPATH)
 
 
+@memoize_extraction
 def get_title_h1_h2_h3(response):
     # Get H1, H2 and title-tagged text data
     def get_text(response_fetch, text_xpath, punctuation='!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~'):
@@ -209,7 +328,7 @@ def get_title_h1_h2_h3(response):
                 return target_string
 
         # Get normalized text
-        title_content = response_fetch.xpath(text_xpath).extract()
+        title_content = get_extraction_context(response_fetch).select(text_xpath)
         content_normalized = list(map(lambda text: normalize_string(text, ' '), title_content))
         final_content = [list(map(lambda y: capitalize_string(y),
                                   filter(lambda x: x not in punctuation, element.split())))
@@ -223,16 +342,17 @@ def get_title_h1_h2_h3(response):
             'title': get_text(response, TITLE_XPATH)}
 
 
+@memoize_extraction
 def get_menu(response):
     # Core method for school content crawling
     # Get menu through a more specific method as it is a special case where we
     # want to understand the hierarchy as well
-    original_dict = generic_get_anchor_and_text(response, MENU_XPATH, MENU_HREF_XPATH)
+    context = get_extraction_context(response)
+    original_dict = generic_get_anchor_and_text(context, MENU_XPATH, MENU_HREF_XPATH)
     original_dict = {link: text for text, link in original_dict.items()}
 
     # Select all menu component and the hierarchical text (e.g. About -> Programme -> Undergraduate)
-    content_selector = response.xpath(MENU_XPATH)
-    content = map(lambda selector: selector.xpath(TEXT_XPATH).extract(), content_selector)
+    content = context.select_text(MENU_XPATH)
 
     # Clean the textual data, which is already tokenized, and join them
     content = map(lambda text_list: list(map(lambda text: ' '.join(text.split()), text_list)), list(content))
@@ -241,8 +361,8 @@ def get_menu(response):
                             list(content)))
 
     # Get the href and zip together
-    href = list(map(lambda each_string: normalize_string(each_string), response.xpath(MENU_HREF_XPATH).extract()))
-    href_temp_list = [[text, response.urljoin(link)] for text, link in zip(content_text, href)
+    href = list(map(lambda each_string: normalize_string(each_string), context.select(MENU_HREF_XPATH)))
+    href_temp_list = [[text, context.urljoin(link)] for text, link in zip(content_text, href)
                       if not(check_word_filter(text, MENU_TEXT_FILTER))]
     href_dict = {}
     for tuple_pair in href_temp_list:
@@ -283,6 +403,19 @@ def normalize_string(target_string, separator=''):
     return separator.join(target_string.split())
 
 
+def normalize_link(link_url):
+    # Treat URL with slash at the end as the same as those without a slash
+    if link_url[-1] == '/':
+        return link_url[:-1]
+    else:
+        return link_url
+
+
+def hash_string(target_string):
+    # Stable 64-bit hash of a string, kept the same across processes in case the request is serialized
+    return int.from_bytes(hashlib.md5(target_string.encode('utf-8')).digest()[:8], 'big')
+
+
 def check_word_filter(target_string, filter_set):
     # Check whether certain keyword should be filtered
     target_string_lower = target_string.lower()
@@ -63,5 +63,88 @@ CREATE TABLE IF NOT EXISTS profiles (
   phd_school TEXT,
   promotion_year TEXT,
   text_raw TEXT,
-  user_updated INTEGER
+  user_updated INTEGER,
+  content_hash TEXT,
+  last_seen TEXT,
+  phd_year_int INTEGER,
+  promotion_year_int INTEGER,
+  phd_school_rank INTEGER,
+  research_sentences TEXT,
+  research_keywords TEXT,
+  research_vector BLOB,
+  keyword_vectors BLOB,
+  revision INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS profiles_department_position_tag ON profiles (department, position, tag);
+CREATE INDEX IF NOT EXISTS profiles_department_university ON profiles (department, university);
+CREATE INDEX IF NOT EXISTS profiles_department_tag_university ON profiles (department, tag, university);
+
+CREATE TABLE IF NOT EXISTS profile_changes (
+  revision INTEGER PRIMARY KEY AUTOINCREMENT,
+  profile_link TEXT NOT NULL,
+  change_type TEXT NOT NULL,
+  changed_at TEXT NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS profiles_insert_change AFTER INSERT ON profiles
+BEGIN
+  INSERT INTO profile_changes (profile_link, change_type, changed_at)
+  VALUES (NEW.profile_link, 'insert', datetime('now', 'localtime'));
+  UPDATE profiles SET revision = last_insert_rowid() WHERE profile_link = NEW.profile_link;
+END;
+
+CREATE TRIGGER IF NOT EXISTS profiles_update_change
+AFTER UPDATE OF name, department, university, tag, position, phd_year, phd_school, promotion_year, text_raw ON profiles
+WHEN NEW.name IS NOT OLD.name OR NEW.department IS NOT OLD.department OR NEW.university IS NOT OLD.university
+  OR NEW.tag IS NOT OLD.tag OR NEW.position IS NOT OLD.position OR NEW.phd_year IS NOT OLD.phd_year
+  OR NEW.phd_school IS NOT OLD.phd_school OR NEW.promotion_year IS NOT OLD.promotion_year
+  OR NEW.text_raw IS NOT OLD.text_raw
+BEGIN
+  INSERT INTO profile_changes (profile_link, change_type, changed_at)
+  VALUES (NEW.profile_link, CASE WHEN NEW.user_updated = 1 THEN 'edit' ELSE 'update' END, datetime('now', 'localtime'));
+  UPDATE profiles SET revision = last_insert_rowid() WHERE profile_link = NEW.profile_link;
+END;
+
+CREATE TRIGGER IF NOT EXISTS profiles_delete_change AFTER DELETE ON profiles
+BEGIN
+  INSERT INTO profile_changes (profile_link, change_type, changed_at)
+  VALUES (OLD.profile_link, 'delete', datetime('now', 'localtime'));
+END;
+
+CREATE TABLE IF NOT EXISTS profile_patterns (
+  start_url TEXT NOT NULL,
+  title TEXT,
+  netloc TEXT NOT NULL,
+  path TEXT NOT NULL,
+  PRIMARY KEY (start_url, title)
+);
+
+CREATE TABLE IF NOT EXISTS directory_seeds (
+  seed_url TEXT NOT NULL,
+  seed_title TEXT,
+  directory_url TEXT NOT NULL,
+  original_url TEXT NOT NULL,
+  original_title TEXT,
+  university TEXT,
+  is_department TEXT,
+  tag TEXT,
+  item_count INTEGER NOT NULL,
+  last_found TEXT,
+  PRIMARY KEY (seed_url, seed_title, directory_url)
+);
+
+CREATE TABLE IF NOT EXISTS rejected_pages (
+  profile_link TEXT PRIMARY KEY,
+  content_hash TEXT NOT NULL,
+  last_seen TEXT
+);
+
+CREATE TABLE IF NOT EXISTS school_ranks (
+  school TEXT NOT NULL,
+  table_version TEXT NOT NULL,
+  matched_name TEXT,
+  rank INTEGER,
+  score INTEGER,
+  PRIMARY KEY (school, table_version)
 );